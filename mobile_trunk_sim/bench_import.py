@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Benchmark of the import time of the simulation modules.
+
+Each module is imported in a fresh interpreter with 'python -X importtime' and
+the best cumulative time of several runs is kept. The modules must also not
+pull in the ones they do not use (Tk, ROS for a plain SummitXL scene).
+
+    python3 bench_import.py --update     # stores the current times as the baseline
+    python3 bench_import.py              # fails when a module is slower than the baseline
+
+The baseline is kept in bench_import.json, next to this file.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Module -> modules it must not import
+modules = {
+    "summit_xl": ["turtle", "tkinter", "rclpy", "sofaros", "stlib3", "summitxl_roscontroller"],
+    "summitxl_controller": ["turtle", "tkinter", "rclpy", "sofaros", "splib3", "stlib3"],
+    "ros_summitxl": ["turtle", "tkinter", "sofaros"],
+}
+
+baselineFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_import.json")
+
+
+def importTime(module, runs=5):
+    """Returns the best cumulative import time of the module in microseconds
+       and the list of the modules loaded with it
+    """
+    code = "import sys, {0}; print(' '.join(sys.modules))".format(module)
+    best = None
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(baselineFile), check=True)
+        for line in result.stderr.splitlines():
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                cumulative = int(fields[1])
+                best = cumulative if best is None else min(best, cumulative)
+        loaded = result.stdout.split()
+    return best, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the import time of the simulation modules.")
+    parser.add_argument("--runs", type=int, default=5, help="number of imports of each module")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="allowed ratio between the measured and the baseline times")
+    parser.add_argument("--update", action="store_true", help="store the measured times as the baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(baselineFile):
+        with open(baselineFile) as file:
+            baseline = json.load(file)
+
+    failed = False
+    times = {}
+    for module, forbidden in modules.items():
+        times[module], loaded = importTime(module, args.runs)
+        status = ""
+        if module in baseline and not args.update:
+            ratio = times[module] / baseline[module]
+            status = "{0:5.2f}x baseline".format(ratio)
+            if ratio > args.tolerance:
+                status += " REGRESSION"
+                failed = True
+        unexpected = sorted(name for name in forbidden if name in loaded)
+        if unexpected:
+            status += " imports " + ", ".join(unexpected)
+            failed = True
+        print("{0:24s} {1:10.1f} ms {2}".format(module, times[module] / 1000., status))
+
+    if args.update:
+        with open(baselineFile, "w") as file:
+            json.dump(times, file, indent=2)
+        print("baseline written in " + baselineFile)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Benchmark of the per step cost of SummitxlROSController.onAnimateBeginEvent at 1 kHz.
+
+Compares the bulk pose synchronization with the previous element by element one.
+
+    python3 bench_posesync.py --steps 10000
+"""
+import argparse
+import time
+import Sofa
+from summit_xl import SummitXL
+from summitxl_roscontroller import SummitxlROSController
+
+
+class LegacyROSController(SummitxlROSController):
+    """The pose synchronization as it was done before, one element at a time"""
+    def onAnimateBeginEvent(self, event):
+        if self.time_now is not None:
+            dt = float(self.robot.timestamp.value[0])+float(self.robot.timestamp.value[1])/1000000000  - self.time_now
+            self.time_now = float(self.robot.timestamp.value[0])+float(self.robot.timestamp.value[1])/1000000000
+        else:
+            dt=0
+            self.time_now = float(self.robot.timestamp.value[0])+float(self.robot.timestamp.value[1])/1000000000
+
+        self.robot.robot_linear_x = self.robot.robot_linear_vel[0]  * dt
+        self.robot.robot_angular_z = self.robot.robot_angular_vel[2] * dt
+
+        with self.robot.Chassis.Debug.position.position.writeable() as debug_pose:
+            for i in range(0, 3):
+                debug_pose[0][i] =  self.robot.Chassis.position.position.value[0][i]
+            for i in range(0, 4):
+                debug_pose[0][3+i] = self.robot.reel_orientation[i]
+
+        with self.robot.Chassis.Reel_robot.position.position.writeable() as robot_pose:
+            for i in range(0,3):
+                robot_pose[0][i] =  self.robot.reel_position[i]
+            for i in range(0,4):
+                robot_pose[0][3+i] = self.robot.reel_orientation[i]
+
+        for i in range(0,4):
+            self.robot.sim_orientation[i] = self.robot.Chassis.position.position.value[0][3+i]
+        for i in range(0,3):
+            self.robot.sim_position[i] = self.robot.Chassis.position.position.value[0][i]
+
+        self.move(self.robot.robot_linear_x, self.robot.robot_angular_z)
+
+
+def measure(controllerType, steps, dt=0.001):
+    """Returns the mean cost in microseconds of one onAnimateBeginEvent"""
+    root = Sofa.Core.Node("root")
+    robot = SummitXL(root, lod="none")
+    controller = robot.addObject(controllerType(name="Controller", robot=robot))
+    robot.reel_position.value = [0., 0., 0.]
+    robot.reel_orientation.value = [0., 0., 0., 1.]
+    robot.robot_linear_vel.value = [0.1, 0., 0.]
+    robot.robot_angular_vel.value = [0., 0., 0.1]
+    event = {"dt": dt}
+
+    start = time.perf_counter()
+    for i in range(steps):
+        robot.timestamp.value = [i // 1000, (i % 1000) * 1000000]
+        controller.onAnimateBeginEvent(event)
+    return (time.perf_counter() - start) / steps * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the per step cost of the ROS controller.")
+    parser.add_argument("--steps", type=int, default=10000, help="number of 1 ms steps")
+    args = parser.parse_args()
+
+    before = measure(LegacyROSController, args.steps)
+    after = measure(SummitxlROSController, args.steps)
+    print("element by element: {0:8.1f} us/step ({1:5.1f}% of a 1 kHz step)".format(before, before / 10))
+    print("bulk              : {0:8.1f} us/step ({1:5.1f}% of a 1 kHz step)".format(after, after / 10))
+    print("speedup           : {0:8.1f}x".format(before / after))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Microbenchmark of the ROS message conversions of summitxl_roscontroller.
+
+Compares the messages/sec of the functions building a new message at each call
+(send, vel_send, odom_send) with the senders filling a preallocated one
+(ImuSender, VelSender, OdomSender).
+
+    python3 bench_rosconvert.py --count 100000
+"""
+import argparse
+import time
+import Sofa
+from summitxl_roscontroller import send, vel_send, odom_send, ImuSender, VelSender, OdomSender
+
+
+def createData():
+    """Returns a node holding the Data fields used by the conversions, like the SummitXL prefab"""
+    node = Sofa.Core.Node("SummitXL")
+    node.addData(name="robot_linear_vel", value=[0.1, 0.0, 0.0], type="Vec3d", help="", group="bench")
+    node.addData(name="robot_angular_vel", value=[0.0, 0.0, 0.2], type="Vec3d", help="", group="bench")
+    node.addData(name="sim_orientation", value=[0., 0.38, 0., 0.92], type="Vec4d", help="", group="bench")
+    node.addData(name="linear_acceleration", value=[0.0, 0.0, 0.0], type="Vec3d", help="", group="bench")
+    node.addData(name="timestamp", value=[12, 500], type="vector<int>", help="", group="bench")
+    node.addData(name="sim_position", value=[1.0, 0.0, 2.0], type="Vec3d", help="", group="bench")
+    return node
+
+
+def measure(fn, data, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn(data)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the messages/sec of the ROS conversions.")
+    parser.add_argument("--count", type=int, default=100000, help="number of conversions per function")
+    args = parser.parse_args()
+
+    robot = createData()
+    imu = [robot.findData('sim_orientation'), robot.findData('robot_angular_vel'),
+           robot.findData('linear_acceleration'), robot.findData('timestamp')]
+    vel = [robot.findData('robot_linear_vel'), robot.findData('robot_angular_vel')]
+    odom = [robot.findData('timestamp'), robot.findData('sim_position'), robot.findData('sim_orientation'),
+            robot.findData('robot_linear_vel'), robot.findData('robot_angular_vel')]
+
+    print("{0:<8}{1:>16}{2:>16}{3:>10}".format("topic", "before (msg/s)", "after (msg/s)", "speedup"))
+    for name, before, after, data in [("imu", send, ImuSender(), imu),
+                                      ("cmd_vel", vel_send, VelSender(), vel),
+                                      ("odom", odom_send, OdomSender(), odom)]:
+        b = measure(before, data, args.count)
+        a = measure(after, data, args.count)
+        print("{0:<8}{1:>16.0f}{2:>16.0f}{3:>9.1f}x".format(name, b, a, a / b))
+
+
+if __name__ == "__main__":
+    main()
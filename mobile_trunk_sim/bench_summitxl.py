@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Benchmark suite of the SummitXL scenes.
+
+Each scenario is built and animated in a fresh process, one after the other,
+and reports its build time (scene creation and init), its step times and the
+memory it uses (growth of the peak resident set size of the process):
+
+    summitxl        the SummitXL prefab alone
+    controller      the SummitXL driven by a command timeline through the SummitxlController
+    roscontroller   the ros_summitxl scene on a LocalTransport, fed by a fake robot whose
+                    odometry syncs the pose and runs the PoseEstimator
+    fleet1/10/50    fleets of 1, 10 and 50 SummitXL each driven by its own timeline
+                    and moved by its own SummitxlController
+    batched10/50    the same fleets moved by one FleetController (batched kinematics)
+
+The results are written as JSON in bench_results/<commit>.json so that two
+commits can be compared:
+
+    python3 bench_summitxl.py --steps 2000
+    python3 bench_summitxl.py --compare bench_results/1a2b3c4.json
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+import numpy
+
+here = os.path.dirname(os.path.abspath(__file__))
+resultsDir = os.path.join(here, "bench_results")
+
+scenarios = ["summitxl", "controller", "roscontroller", "fleet1", "fleet10", "fleet50", "batched10", "batched50"]
+
+# Metrics compared between two runs, a larger value is a regression
+metrics = ["build_s", "step_mean_us", "step_p99_us", "memory_mb"]
+
+
+def drive(robot, seed, steps, controller=True):
+    """Adds a random command timeline and, unless the robot is moved by a FleetController,
+       a SummitxlController to a robot
+    """
+    from summitxl_controller import SummitxlController, TimelinePlayback
+    from summitxl_posesink import NullSink
+    from summitxl_timeline import randomTimeline
+
+    robot.addObject(TimelinePlayback(name="TimelinePlayback", robot=robot,
+                                     timeline=randomTimeline(steps, hold=100, seed=seed)))
+    if controller:
+        robot.addObject(SummitxlController(name="KeyboardController", robot=robot, sink=NullSink()))
+
+
+def createScene(rootNode, scenario, lod="none", steps=100000):
+    """Builds the scene of a scenario"""
+    if scenario == "roscontroller":
+        import ros_summitxl
+        from local_summitxl import FakeRobot
+        from summitxl_transport import LocalTransport
+        transport = LocalTransport()
+        rootNode.addObject(FakeRobot(name="FakeRobot", transport=transport))
+        return ros_summitxl.createScene(rootNode, transport=transport, lod=lod)
+
+    from stlib3.scene import Scene
+    from summit_xl import SummitXL, SummitXLFleet
+    scene = Scene(rootNode)
+    scene.addMainHeader()
+    scene.dt = 0.001
+    scene.gravity = [0., -9810., 0.]
+    if scenario == "summitxl":
+        SummitXL(scene.Modelling, lod=lod)
+    elif scenario == "controller":
+        drive(SummitXL(scene.Modelling, lod=lod), 0, steps)
+    elif scenario.startswith("fleet") or scenario.startswith("batched"):
+        batched = scenario.startswith("batched")
+        fleet = SummitXLFleet(scene.Modelling, int(scenario[len("batched" if batched else "fleet"):]), lod=lod)
+        for i, robot in enumerate(fleet.children):
+            if robot.name.value.startswith("SummitXL"):
+                drive(robot, i, steps, controller=not batched)
+        if batched:
+            from summitxl_controller import FleetController
+            # in a last child so that it runs after the timelines of the robots
+            fleet.addChild("Kinematics").addObject(FleetController(name="FleetController", fleet=fleet))
+    else:
+        raise ValueError("Unknown scenario '{0}', expected one of {1}".format(scenario, ", ".join(scenarios)))
+    scene.Simulation.addChild(scene.Modelling)
+    return rootNode
+
+
+def peakMemory():
+    """Peak resident set size of the process in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+
+
+def measure(task):
+    """Runs one scenario in the current process and returns its metrics"""
+    import Sofa
+    import Sofa.Simulation
+    import SofaRuntime
+
+    scenario, steps, lod = task
+    SofaRuntime.importPlugin("SofaComponentAll")
+    memory = peakMemory()
+    start = time.perf_counter()
+    root = Sofa.Core.Node("root")
+    createScene(root, scenario, lod=lod)
+    Sofa.Simulation.init(root)
+    build = time.perf_counter() - start
+
+    dt = root.dt.value
+    timings = numpy.empty(steps)
+    clock = time.perf_counter
+    for i in range(steps):
+        t = clock()
+        Sofa.Simulation.animate(root, dt)
+        timings[i] = clock() - t
+    timings *= 1e6
+    return {"scenario": scenario, "steps": steps, "build_s": build,
+            "step_mean_us": float(timings.mean()), "step_p50_us": float(numpy.percentile(timings, 50)),
+            "step_p99_us": float(numpy.percentile(timings, 99)), "memory_mb": peakMemory() - memory}
+
+
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=here, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline, tolerance):
+    """Prints the ratio of each metric to the baseline, returns True when one exceeds the tolerance"""
+    reference = {r["scenario"]: r for r in baseline["results"]}
+    regression = False
+    print("compared with {0}".format(baseline["commit"]))
+    for r in results:
+        if r["scenario"] not in reference:
+            continue
+        ratios = []
+        for metric in metrics:
+            before = reference[r["scenario"]][metric]
+            ratio = r[metric] / before if before > 0 else 1.
+            flag = " !" if ratio > tolerance else ""
+            regression |= bool(flag)
+            ratios.append("{0} {1:.2f}x{2}".format(metric, ratio, flag))
+        print("{0:14s} {1}".format(r["scenario"], ", ".join(ratios)))
+    return regression
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the SummitXL scenes.")
+    parser.add_argument("--scenarios", default=",".join(scenarios), help="scenarios to run")
+    parser.add_argument("--steps", type=int, default=2000, help="number of steps of each scenario")
+    parser.add_argument("--lod", default="none", help="level of detail of the visual models")
+    parser.add_argument("--output", default=None, help="results file (default: bench_results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="results file of another commit to compare with")
+    parser.add_argument("--tolerance", type=float, default=1.2, help="ratio above which a metric is a regression")
+    args = parser.parse_args()
+
+    tasks = [(scenario, args.steps, args.lod) for scenario in args.scenarios.split(",")]
+    # A fresh process per scenario so that the memory and the SOFA state of one do not leak in the next
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        results = pool.map(measure, tasks)
+
+    print("{0:14s} {1:>9s} {2:>12s} {3:>12s} {4:>12s} {5:>10s}".format(
+        "scenario", "build s", "mean us", "p50 us", "p99 us", "memory MB"))
+    for r in results:
+        print("{0:14s} {1:9.3f} {2:12.1f} {3:12.1f} {4:12.1f} {5:10.1f}".format(
+            r["scenario"], r["build_s"], r["step_mean_us"], r["step_p50_us"], r["step_p99_us"], r["memory_mb"]))
+
+    report = {"commit": commit(), "date": datetime.datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+              "lod": args.lod, "results": results}
+    output = args.output or os.path.join(resultsDir, report["commit"] + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print("results written in " + output)
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            if compare(results, json.load(file), args.tolerance):
+                raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Collision benchmark of a SummitXL driving among static obstacles.
+
+The robot carries a box shaped Bumper collision model and follows a random
+command timeline among 'count' box obstacles (see summit_xl.Obstacles). The
+scene can be opened with runSofa, or run as a benchmark measuring the time of
+the steps and of the broad and narrow phases (from the SOFA AdvancedTimer) as
+the obstacle count grows, for each collision pipeline and with merged or
+separate obstacles:
+
+    python3 collision_test.py --counts 50,100,200,400,800 --steps 200 --output collision.json
+
+For each setting, the growth exponent of the step time with the obstacle count
+is fitted on a log-log scale. The benchmark fails when the reference setting
+(one merged obstacle mesh with the BVH narrow phase) does not grow sub-linearly.
+"""
+import argparse
+import json
+import multiprocessing
+import time
+import numpy
+import Sofa
+from summit_xl import SummitXL, Floor, Obstacles, boxes
+from summitxl_profiler import frames
+
+# Collision pipelines: the broad and narrow phase components. The sweep and prune
+# is only a narrow phase since DirectSAP was split, it follows the same broad phase.
+pipelines = {
+    "bruteforce": [("BruteForceBroadPhase", {}), ("BVHNarrowPhase", {})],
+    "sap": [("BruteForceBroadPhase", {}), ("DirectSAPNarrowPhase", {})],
+    "parallel": [("ParallelBruteForceBroadPhase", {}), ("ParallelBVHNarrowPhase", {})],
+}
+pipelinePlugins = {"parallel": ["MultiThreading"]}
+
+# The setting expected to scale sub-linearly
+reference = ("bruteforce", True)
+
+timerName = "Animate"
+phases = ["BroadPhase", "NarrowPhase"]
+
+
+def Bumper(robot, size=[0.62, 0.3, 0.75]):
+    """A box collision model following the chassis of the robot"""
+    bumper = robot.Chassis.addChild("Bumper")
+    positions, triangles = boxes([[0., size[1] / 2., 0.]], size)
+    topology = bumper.addObject('MeshTopology', name='topo')
+    topology.position.value = positions
+    topology.triangles.value = triangles
+    bumper.addObject('MechanicalObject', name='dofs')
+    bumper.addObject('TriangleCollisionModel')
+    bumper.addObject('LineCollisionModel')
+    bumper.addObject('PointCollisionModel')
+    bumper.addObject('RigidMapping', input=robot.Chassis.position.getLinkPath(), index=0)
+    return bumper
+
+
+def createScene(rootNode, count=200, merged=True, pipeline="bruteforce", steps=100000, seed=0):
+    """The collision scene.
+
+    Args:
+        count (int): number of obstacles
+        merged (bool): obstacles merged in one mesh or in one node each
+        pipeline (str): broad and narrow phases, one of the keys of pipelines
+        steps (int): length of the random command timeline
+        seed (int): seed of the obstacles and of the commands
+    """
+    from stlib3.scene import Scene
+    from summitxl_controller import SummitxlController, TimelinePlayback
+    from summitxl_posesink import NullSink
+    from summitxl_timeline import randomTimeline
+
+    scene = Scene(rootNode)
+    scene.addMainHeader()
+    scene.dt = 0.01
+    scene.gravity = [0., -9810., 0.]
+    for plugin in pipelinePlugins.get(pipeline, []):
+        rootNode.addObject('RequiredPlugin', name=plugin)
+    rootNode.addObject('CollisionPipeline')
+    for component, args in pipelines[pipeline]:
+        rootNode.addObject(component, **args)
+    rootNode.addObject('MinProximityIntersection', alarmDistance=0.05, contactDistance=0.01)
+    rootNode.addObject('CollisionResponse')
+
+    robot = SummitXL(scene.Modelling, lod="none")
+    Bumper(robot)
+    robot.addObject(TimelinePlayback(name="TimelinePlayback", robot=robot,
+                                     timeline=randomTimeline(steps, dt=0.01, hold=100, speed=1., turn=1., seed=seed)))
+    robot.addObject(SummitxlController(name="KeyboardController", robot=robot, sink=NullSink()))
+    Floor(scene.Modelling, rotation=[90,0,0], translation=[-5,-0.12,-5], scale=10)
+    Obstacles(scene.Modelling, count=count, merged=merged, seed=seed)
+
+    scene.Simulation.addChild(scene.Modelling)
+    return rootNode
+
+
+def phaseTimes(record, times):
+    """Adds the total time in ms of the broad and narrow phase frames of an AdvancedTimer record,
+       the repeated frames (lists of records) are all added
+    """
+    for name, child in frames(record):
+        phase = next((p for p in phases if p in name), None)
+        if phase is not None and isinstance(child.get("total_time"), (int, float)):
+            times[phase] += child["total_time"]
+        else:
+            phaseTimes(child, times)
+    return times
+
+
+def measure(task):
+    """Builds one setting in the current process, returns its mean times in ms per step"""
+    import Sofa.Simulation
+    import Sofa.Timer
+    import SofaRuntime
+
+    count, merged, pipeline, steps = task
+    SofaRuntime.importPlugin("SofaComponentAll")
+    root = Sofa.Core.Node("root")
+    start = time.perf_counter()
+    createScene(root, count=count, merged=merged, pipeline=pipeline)
+    Sofa.Simulation.init(root)
+    build = time.perf_counter() - start
+
+    Sofa.Timer.setEnabled(timerName, True)
+    Sofa.Timer.setInterval(timerName, 1)
+    Sofa.Timer.setOutputType(timerName, "json")
+    dt = root.dt.value
+    total = 0.
+    times = {phase: 0. for phase in phases}
+    for _ in range(steps):
+        start = time.perf_counter()
+        Sofa.Simulation.animate(root, dt)
+        total += time.perf_counter() - start
+        records = Sofa.Timer.getRecords(timerName)
+        if isinstance(records, dict):
+            phaseTimes(records, times)
+    result = {"count": count, "merged": merged, "pipeline": pipeline, "build_s": build,
+              "step_ms": total / steps * 1e3}
+    result.update({phase + "_ms": value / steps for phase, value in times.items()})
+    return result
+
+
+def growth(counts, values):
+    """Exponent k of values ~ counts^k fitted on a log-log scale"""
+    return float(numpy.polyfit(numpy.log(counts), numpy.log(numpy.maximum(values, 1e-9)), 1)[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the collision cost as the obstacle count grows.")
+    parser.add_argument("--counts", default="50,100,200,400,800", help="obstacle counts")
+    parser.add_argument("--steps", type=int, default=200, help="number of steps of each setting")
+    parser.add_argument("--pipelines", default="bruteforce,sap", help="pipelines measured, among " + ", ".join(pipelines))
+    parser.add_argument("--output", default=None, help="JSON file of the results")
+    args = parser.parse_args()
+
+    counts = [int(c) for c in args.counts.split(",")]
+    settings = [(pipeline, merged) for pipeline in args.pipelines.split(",") for merged in (True, False)]
+    tasks = [(count, merged, pipeline, args.steps) for pipeline, merged in settings for count in counts]
+
+    # One process per setting, measured one after the other
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        results = pool.map(measure, tasks)
+
+    print("{0:12s} {1:8s} {2:>6s} {3:>10s} {4:>10s} {5:>10s}".format(
+        "pipeline", "merged", "count", "step ms", "broad ms", "narrow ms"))
+    for r in results:
+        print("{0:12s} {1:8s} {2:6d} {3:10.3f} {4:10.3f} {5:10.3f}".format(
+            r["pipeline"], str(r["merged"]), r["count"], r["step_ms"], r["BroadPhase_ms"], r["NarrowPhase_ms"]))
+
+    exponents = {}
+    failed = False
+    for pipeline, merged in settings:
+        steps = [r["step_ms"] for r in results if r["pipeline"] == pipeline and r["merged"] == merged]
+        k = growth(counts, steps) if len(counts) > 1 else 0.
+        exponents["{0}/{1}".format(pipeline, "merged" if merged else "separate")] = k
+        status = ""
+        if (pipeline, merged) == reference and k >= 1.:
+            status = " NOT SUB-LINEAR"
+            failed = True
+        print("{0:12s} {1:8s} step time ~ count^{2:.2f}{3}".format(pipeline, str(merged), k, status))
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump({"results": results, "growth": exponents}, file, indent=2)
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2 @@
+# collision_test.py is the collision benchmark (see its --help), not a test module
+collect_ignore = ["collision_test.py"]
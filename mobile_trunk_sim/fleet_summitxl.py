@@ -0,0 +1,21 @@
+from stlib3.scene import Scene
+from summit_xl import SummitXLFleet, Floor
+from summitxl_controller import FleetController
+
+
+def createScene(rootNode, count=50, layout="grid", lod="simplified"):
+    """A warehouse like scene with a fleet of SummitXL sharing their meshes,
+       moved together by a FleetController"""
+    scene = Scene(rootNode)
+    scene.addMainHeader()
+    scene.dt = 0.001
+    scene.gravity = [0., -9810., 0.]
+
+    fleet = SummitXLFleet(scene.Modelling, count, layout=layout, lod=lod)
+    # in a last child so that it runs after the controllers of the robots writing their commands
+    fleet.addChild("Kinematics").addObject(FleetController(name="FleetController", fleet=fleet))
+    Floor(scene.Modelling, rotation=[90,0,0], translation=[-2,-0.12,-2], scale=4)
+
+    scene.Simulation.addChild(scene.Modelling)
+
+    return rootNode
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Runs the summit_xl scene without GUI as fast as possible.
+
+Example:
+    python3 headless_summitxl.py --steps 10000 --sink off
+    python3 headless_summitxl.py --steps 10000 --sink decimated --every 500
+    python3 headless_summitxl.py --steps 10000 --sink file --output trajectory.bin
+    python3 headless_summitxl.py --steps 1000000 --sink off --timeline commands.npy
+
+The trajectory file can be read back with summitxl_posesink.loadTrajectory.
+"""
+import argparse
+import time
+import Sofa
+import Sofa.Simulation
+import SofaRuntime
+import summit_xl
+from summitxl_posesink import createSink
+from summitxl_meshlod import lods
+
+plugins = ["SofaComponentAll"]
+
+
+def run(steps, sink, createScene=summit_xl.createScene, timings=None, **sceneArgs):
+    """Builds the scene and animates it for the given number of steps.
+
+    Args:
+        steps (int): number of simulation steps
+        sink: where the controller sends the chassis pose (see summitxl_posesink)
+        createScene: the scene builder, it must accept a 'sink' argument
+        timings: optional array of at least 'steps' values filled with the duration
+                 in seconds of each step
+        sceneArgs: extra arguments forwarded to createScene
+
+    Returns:
+        (root, stepspersec): the root node and the achieved steps per second
+    """
+    for plugin in plugins:
+        SofaRuntime.importPlugin(plugin)
+
+    root = Sofa.Core.Node("root")
+    createScene(root, sink=sink, **sceneArgs)
+    Sofa.Simulation.init(root)
+
+    dt = root.dt.value
+    start = time.perf_counter()
+    try:
+        if timings is None:
+            for _ in range(steps):
+                Sofa.Simulation.animate(root, dt)
+        else:
+            clock = time.perf_counter
+            for i in range(steps):
+                t = clock()
+                Sofa.Simulation.animate(root, dt)
+                timings[i] = clock() - t
+    finally:
+        elapsed = time.perf_counter() - start
+        sink.close()
+    return root, steps / elapsed if elapsed > 0 else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the summit_xl scene without GUI.")
+    parser.add_argument("--steps", type=int, default=1000, help="number of simulation steps")
+    parser.add_argument("--sink", choices=["off", "decimated", "file", "print"], default="off",
+                        help="where the chassis pose is sent at each step")
+    parser.add_argument("--every", type=int, default=100, help="steps between two poses with --sink decimated")
+    parser.add_argument("--output", default="trajectory.bin", help="trajectory file with --sink file")
+    parser.add_argument("--lod", choices=lods, default="none",
+                        help="level of detail of the visual models, none skips them")
+    parser.add_argument("--timeline", default=None,
+                        help="command timeline (.npy, see summitxl_timeline) played in place of the keyboard")
+    parser.add_argument("--profile", default=None,
+                        help="write the step timings as folded stacks (flame graph) in this file")
+    args = parser.parse_args()
+
+    sink = createSink(args.sink, every=args.every, filename=args.output)
+    _, stepspersec = run(args.steps, sink, lod=args.lod, profile=args.profile, timeline=args.timeline)
+    print("{0} steps, {1:.1f} steps/sec".format(args.steps, stepspersec))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Runs the ros_summitxl scene on the in-process LocalTransport, without ROS graph.
+
+A FakeRobot publishes the real robot odom and cmd_vel on the local topics at
+each step and counts the messages published by the simulation, so the scene
+and the message conversions can be load tested end to end on one machine. Like
+summitxl_odom_standin, its odometry starts away from y = 0, as the controller
+waits for a non null position before it syncs the pose and runs the PoseEstimator.
+
+    python3 local_summitxl.py --steps 10000
+"""
+import argparse
+import math
+import time
+import Sofa
+import Sofa.Simulation
+import SofaRuntime
+from geometry_msgs.msg import Twist
+from nav_msgs.msg import Odometry
+import ros_summitxl
+from summitxl_transport import LocalTransport
+
+plugins = ["SofaComponentAll"]
+
+realTopics = {"cmd_vel": "/summit_xl/robotnik_base_control/cmd_vel",
+              "odom": "/summit_xl/robotnik_base_control/odom"}
+
+
+class FakeRobot(Sofa.Core.Controller):
+    """Plays the real robot on a LocalTransport: it drives at 'speed' and 'turn' and
+       publishes its odometry and its cmd_vel at the beginning of each step.
+
+    It must be added to the root node so that its messages are received in the same step.
+
+    Args:
+        transport (LocalTransport): the transport of the scene
+        speed (float): forward velocity
+        turn (float): rotation velocity
+        offset (float): lateral (y) position of the start of the odometry, the
+                        controller ignores the odometry while reel_position[0] is 0
+    """
+    def __init__(self, *args, **kwargs):
+        transport = kwargs.pop("transport")
+        self.speed = kwargs.pop("speed", 0.1)
+        self.turn = kwargs.pop("turn", 0.)
+        self.offset = kwargs.pop("offset", 1.)
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        node = transport.node
+        self.cmdPub = node.create_publisher(Twist, realTopics["cmd_vel"], 10)
+        self.odomPub = node.create_publisher(Odometry, realTopics["odom"], 10)
+        self.received = {topic: 0 for topic in ros_summitxl.publishRates}
+        for topic in ros_summitxl.publishRates:
+            node.create_subscription(None, topic, self.counter(topic), 10)
+        self.twist = Twist()
+        self.twist.linear.x = self.speed
+        self.twist.angular.z = self.turn
+        self.odom = Odometry()
+        self.time = 0.
+        self.x = 0.
+        self.y = 0.
+        self.th = 0.
+
+    def counter(self, topic):
+        def fn(msg):
+            self.received[topic] += 1
+        return fn
+
+    def onAnimateBeginEvent(self, event):
+        dt = event['dt']
+        self.time += dt
+        self.x += self.speed * math.cos(self.th) * dt
+        self.y += self.speed * math.sin(self.th) * dt
+        self.th += self.turn * dt
+        stamp = self.odom.header.stamp
+        stamp.sec = int(self.time)
+        stamp.nanosec = int((self.time - stamp.sec) * 1e9)
+        pose = self.odom.pose.pose
+        pose.position.x = self.x
+        pose.position.y = self.offset + self.y
+        pose.orientation.z = math.sin(self.th / 2)
+        pose.orientation.w = math.cos(self.th / 2)
+        self.cmdPub.publish(self.twist)
+        self.odomPub.publish(self.odom)
+
+
+def run(steps, **sceneArgs):
+    """Builds the scene on a LocalTransport and animates it.
+
+    Returns:
+        (root, stepspersec, received): the root node, the achieved steps per second
+        and the number of messages received per sofa_sim topic
+    """
+    for plugin in plugins:
+        SofaRuntime.importPlugin(plugin)
+
+    transport = LocalTransport()
+    root = Sofa.Core.Node("root")
+    robot = root.addObject(FakeRobot(name="FakeRobot", transport=transport))
+    ros_summitxl.createScene(root, transport=transport, **sceneArgs)
+    Sofa.Simulation.init(root)
+
+    dt = root.dt.value
+    start = time.perf_counter()
+    for _ in range(steps):
+        Sofa.Simulation.animate(root, dt)
+    elapsed = time.perf_counter() - start
+    return root, steps / elapsed if elapsed > 0 else float("inf"), robot.received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the ros_summitxl scene without ROS graph.")
+    parser.add_argument("--steps", type=int, default=1000, help="number of simulation steps")
+    args = parser.parse_args()
+
+    root, stepspersec, received = run(args.steps)
+    print("{0} steps, {1:.1f} steps/sec".format(args.steps, stepspersec))
+    for topic, count in received.items():
+        print("{0}: {1} messages".format(topic, count))
+
+    controller = root.Modelling.SummitXL.KeyboardController
+    if controller.flag:
+        raise SystemExit("The pose was never synced with the odometry")
+    if controller.estimator is not None:
+        print("estimator: last odometry at {0:.3f} s, error [x, y, z, yaw] {1}".format(
+            controller.estimator.last, ["{0:.4f}".format(e) for e in controller.estimator.error]))
+
+
+if __name__ == "__main__":
+    main()
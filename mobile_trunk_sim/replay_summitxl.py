@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""Replays a log recorded by ros_summitxl (see summitxl_trajlog) without ROS.
+
+    python3 replay_summitxl.py drive.npz --steps 100000 --timescale 1 --output replay.bin
+
+The chassis pose of each step is written in the output trajectory file
+(see summitxl_posesink) so that two replays can be compared.
+"""
+import argparse
+from stlib3.scene import Scene
+from summit_xl import SummitXL, Floor
+from summitxl_roscontroller import SummitxlROSController
+from summitxl_trajlog import TrajectoryReplay
+
+
+def createScene(rootNode, log="drive.npz", timeScale=1., sink=None, lod="full"):
+    scene = Scene(rootNode)
+    scene.addMainHeader()
+    scene.dt = 0.01
+    scene.gravity = [0., -9810., 0.]
+
+    robot = SummitXL(scene.Modelling, lod=lod)
+    Floor(scene.Modelling, rotation=[90,0,0], translation=[-2,-0.12,-2], scale=4)
+
+    # The replay has to be before the controller to feed it at the beginning of each step
+    robot.addObject(TrajectoryReplay(name="Replay", robot=robot, log=log, timeScale=timeScale, sink=sink))
+    robot.addObject(SummitxlROSController(name="KeyboardController", robot=robot))
+
+    scene.Simulation.addChild(scene.Modelling)
+
+    return rootNode
+
+
+def main():
+    import headless_summitxl
+    from summitxl_posesink import createSink
+    parser = argparse.ArgumentParser(description="Replays a recorded log without ROS.")
+    parser.add_argument("log", help="log recorded by ros_summitxl")
+    parser.add_argument("--steps", type=int, default=1000, help="number of simulation steps")
+    parser.add_argument("--timescale", type=float, default=1., help="seconds of log per second of simulated time")
+    parser.add_argument("--output", default=None, help="trajectory file of the chassis pose")
+    args = parser.parse_args()
+
+    sink = createSink("file", filename=args.output) if args.output else createSink("off")
+    _, stepspersec = headless_summitxl.run(args.steps, sink, createScene=createScene, log=args.log,
+                                           timeScale=args.timescale, lod="none")
+    print("{0} steps, {1:.1f} steps/sec".format(args.steps, stepspersec))
+
+
+if __name__ == "__main__":
+    main()
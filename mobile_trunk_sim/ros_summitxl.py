@@ -1,52 +1,130 @@
-from turtle import position
-import Sofa
+import atexit
 from stlib3.scene import Scene
-from splib3.numerics import Quat
-from math import pi
-import sofaros
-from sofaros import *
 from geometry_msgs.msg import Twist
-from sensor_msgs.msg import Imu
 from summit_xl import SummitXL, Floor
-from summitxl_roscontroller import *
+from summitxl_roscontroller import SummitxlROSController, odom_recv, vel_recv, OdomSender, VelSender
 from nav_msgs.msg import Odometry
+from summitxl_rospublisher import BackgroundPublisher
+from summitxl_transport import RosTransport
+from summitxl_latency import LatencyTracker, trackedRecv, trackedSender
+from summitxl_trajlog import TrajectoryRecorder
+from summitxl_estimator import PoseEstimator
+from summitxl_cmdbuffer import CommandBuffer, bufferedRecv
+from summitxl_laser import Laser
+from summitxl_imu import ImuModel, ImuStream
+from summitxl_controller import Checkpointer
 
-rosNode = sofaros.init("SofaNode")
+# Publish rates of the sofa_sim topics in Hz of simulated time
+publishRates = {"/sofa_sim/imu/data": 200.,
+                "/sofa_sim/odom": 50.,
+                "/sofa_sim/cmd_vel": 50.,
+                "/sofa_sim/scan": 10.}
 
 
-def createScene(rootNode):
+def createScene(rootNode, latencyFile=None, recordFile=None, timeConstant=0.5, commandDelay=0.05, transport=None, laser=True,
+                obstacles=None, checkpoint=None, checkpointPeriod=10., restore=None, lod="full"):
+    """Creates the scene tracking the real summit_xl through ROS.
+
+    Args:
+        latencyFile (str): when given, the latency of the real robot odometry is
+                           measured and exported in latencyFile.npz/.json at exit
+                           (see summitxl_latency)
+        recordFile (str): when given, the received odom and cmd_vel streams are
+                          saved in this log at exit (see summitxl_trajlog)
+        timeConstant (float): time for the simulated robot to converge on the real
+                              robot odometry (see summitxl_estimator), None only
+                              initializes the pose from the first odometry
+        commandDelay (float): delay in seconds at which the received cmd_vel are
+                              interpolated (see summitxl_cmdbuffer), None applies
+                              the last received one
+        transport: where the topics are sent and received (see summitxl_transport),
+                   ROS by default
+        laser (bool): adds the 2D laser scanner of the lazer frame (see summitxl_laser)
+        obstacles (list): nodes of the scene geometry hit by the laser besides the floor
+                          (e.g. summit_xl.Obstacles). The scan is level and the floor is
+                          below the laser, so without them the scans are empty
+        checkpoint (str): file where the robot state is saved every checkpointPeriod
+                          seconds of simulated time and at exit (see summitxl_checkpoint)
+        checkpointPeriod (float): time between two checkpoints
+        restore (str): checkpoint the robot starts from, instead of waiting for the
+                       first odometry to initialize its pose
+        lod: level of detail of the robot visual models (see summitxl_meshlod)
+    """
     scene = Scene(rootNode)
     scene.addMainHeader()
     scene.dt = 0.01
     scene.gravity = [0., -9810., 0.]
 
-    SummitXL(scene.Modelling)
-    Floor(scene.Modelling, rotation=[90,0,0], translation=[-2,-0.12,-2], scale=4)
+    SummitXL(scene.Modelling, lod=lod)
+    floor = Floor(scene.Modelling, rotation=[90,0,0], translation=[-2,-0.12,-2], scale=4)
+    scanned = [floor] + list(obstacles or [])
     robot=scene.Modelling.SummitXL
-    scene.Modelling.SummitXL.addObject(SummitxlROSController(name="KeyboardController", robot=scene.Modelling.SummitXL))
+    transport = transport if transport is not None else RosTransport()
+    publisher = BackgroundPublisher()
+
+    latency = None
+    odomrecv, odomsend, velrecv = odom_recv, OdomSender(), vel_recv
+    if latencyFile is not None:
+        latency = LatencyTracker()
+        odomrecv, odomsend = trackedRecv(latency, odomrecv), trackedSender(latency, odomsend)
+
+        def exportLatency():
+            latency.export(latencyFile)
+            print(latency.report())
+        atexit.register(exportLatency)
+
+    if recordFile is not None:
+        recorder = TrajectoryRecorder()
+        odomrecv, velrecv = recorder.odomRecv(odomrecv), recorder.velRecv(velrecv)
+        atexit.register(recorder.save, recordFile)
+
+    commands = None
+    if commandDelay is not None:
+        commands = CommandBuffer()
+        velrecv = bufferedRecv(commands, velrecv)
+
+    estimator = PoseEstimator(timeConstant) if timeConstant is not None else None
+    controller = SummitxlROSController(name="KeyboardController", robot=scene.Modelling.SummitXL,
+                                       latency=latency, estimator=estimator,
+                                       commands=commands, commandDelay=commandDelay)
+    if checkpoint is not None or restore is not None:
+        # Added before the controller so that its first step starts from the restored state
+        scene.Modelling.SummitXL.addObject(Checkpointer(name="Checkpointer", robot=robot, controller=controller,
+                                                        restore=restore, output=checkpoint, period=checkpointPeriod))
+    scene.Modelling.SummitXL.addObject(controller)
 
 
-    scene.Modelling.SummitXL.addObject(sofaros.RosReceiver(rosNode, "/summit_xl/robotnik_base_control/cmd_vel",
+    scene.Modelling.SummitXL.addObject(transport.receiver("/summit_xl/robotnik_base_control/cmd_vel",
                                            [robot.findData('robot_linear_vel'),robot.findData('robot_angular_vel')],
-                                           Twist, vel_recv))
+                                           Twist, velrecv))
 
 
-    scene.Modelling.SummitXL.addObject(sofaros.RosSender(rosNode, "/sofa_sim/imu/data",[robot.findData('sim_orientation'),
-                                                        robot.findData('robot_angular_vel'), robot.findData('linear_acceleration'),
-                                                        robot.findData('timestamp')],Imu, send))
+    # The IMU samples are interpolated between the steps, faster than the simulation. The
+    # SummitXL has no IMU among its sensor frames (lazer, gps, cameras), its IMU being in
+    # the base: the root of the sensors chain, the chassis origin, is used. The samples
+    # are stamped on the clock of the robot timestamp, like the odom and the scans.
+    scene.Modelling.SummitXL.addObject(ImuModel(name="Imu", robot=robot, index=0,
+                                                rate=publishRates["/sofa_sim/imu/data"],
+                                                stamp=robot.findData('timestamp'),
+                                                output=ImuStream(transport.node, "/sofa_sim/imu/data")))
 
-    scene.Modelling.SummitXL.addObject(sofaros.RosSender(rosNode, "/sofa_sim/odom",[robot.findData('timestamp'),
+    scene.Modelling.SummitXL.addObject(transport.sender("/sofa_sim/odom",[robot.findData('timestamp'),
                                                         robot.findData('sim_position'), robot.findData('sim_orientation'),
                                                         robot.findData('robot_linear_vel'), robot.findData('robot_angular_vel')],
-                                                        Odometry, odom_send))
+                                                        Odometry, odomsend,
+                                                        rate=publishRates["/sofa_sim/odom"], publisher=publisher))
 
-    scene.Modelling.SummitXL.addObject(sofaros.RosReceiver(rosNode, "/summit_xl/robotnik_base_control/odom",[robot.findData('timestamp'),
+    scene.Modelling.SummitXL.addObject(transport.receiver("/summit_xl/robotnik_base_control/odom",[robot.findData('timestamp'),
                                                             robot.findData('reel_position'), robot.findData('reel_orientation')],
-                                                            Odometry, odom_recv))
+                                                            Odometry, odomrecv))
 
-    scene.Modelling.SummitXL.addObject(sofaros.RosSender(rosNode, "/sofa_sim/cmd_vel",
+    scene.Modelling.SummitXL.addObject(transport.sender("/sofa_sim/cmd_vel",
                                            [robot.findData('robot_linear_vel'),robot.findData('robot_angular_vel')],
-                                           Twist, vel_send))
+                                           Twist, VelSender(),
+                                           rate=publishRates["/sofa_sim/cmd_vel"], publisher=publisher))
+    if laser:
+        # The rays are cast in a thread of their own so that the scans do not delay the other topics
+        Laser(robot, transport, obstacles=scanned, rate=publishRates["/sofa_sim/scan"])
     scene.Simulation.addChild(scene.Modelling)
 
     return rootNode
@@ -1,11 +1,44 @@
-from turtle import position
 import Sofa
-from stlib3.scene import Scene
-from splib3.numerics import Quat
-from math import pi
-from summitxl_controller import *
+import numpy
+from math import pi, sqrt, ceil, cos, sin
+from summitxl_controller import SummitxlController, TimelinePlayback
+from summitxl_meshcache import addMesh
+from summitxl_meshlod import checkLod, boxTriangles
 
-def Chassis():
+## Meshes of the visual models and the transform applied to them when loaded
+chassisRotation = [-90,-90,0]
+chassisParts = {
+    "Chassis" : ('meshes/summit_xl_chassis.stl', [0.1,0.1,0.1,1.0]) ,
+    "ChassisCover" : ('meshes/summit_xl_covers.stl', [0.8,0.8,0.8,1.0]),
+    "chassisSimple" : ('meshes/summit_xl_chassis_simple.stl', [0.5,0.5,0.5,1.0])
+}
+wheelRotation = [0,0,90]
+wheelMesh = 'meshes/wheel.stl'
+sensorRotation = [0,90,90]
+sensorParts = {
+    "lazer" : ('meshes/hokuyo_urg_04lx.stl', 1) ,
+    "gps" : ('meshes/antenna_3GO16.stl', 2),
+    "camera" : ('meshes/axis_p5514.stl',3),
+    "camera-RGBD" : ('meshes/orbbec_astra_embedded_s.stl', 4)
+}
+
+def MeshLibrary(parentNode, name="Meshes", lod="full"):
+    """Loads each mesh of the SummitXL once so that several robots can share them.
+       Each mesh is a child node holding a 'loader' and a 'geometry' topology.
+       The meshes are read through the cache of summitxl_meshcache at the given
+       level of detail (see summitxl_meshlod).
+    """
+    self = parentNode.addChild(name)
+    meshes = [(name, filepath, chassisRotation) for name, (filepath, _) in chassisParts.items()]
+    meshes += [(name, filepath, sensorRotation) for name, (filepath, _) in sensorParts.items()]
+    meshes.append(("Wheel", wheelMesh, wheelRotation))
+    for name, filepath, rotation in meshes:
+        mesh = self.addChild(name)
+        addMesh(mesh, filepath, name='loader', rotation=rotation, lod=lod)
+        mesh.addObject('MeshTopology', name='geometry', src='@loader')
+    return self
+
+def Chassis(position=[0,0,0], meshes=None, lod="full"):
     """The summitXL chassis description.
        The chassis is composed of:
             - a rigid frame for its main position
@@ -14,9 +47,18 @@ def Chassis():
                 *lazer
                 *imu
                 *camera
+
+       Args:
+            position: initial position of the chassis
+            meshes: a MeshLibrary node to take the meshes from, when None the
+                    chassis loads its own meshes
+            lod: level of detail of the visual models: "full", "simplified", "bbox"
+                 or "none" to have no visual model (see summitxl_meshlod). When meshes
+                 is given, its level of detail is used unless lod is "none".
     """
+    checkLod(lod)
     self = Sofa.Core.Node("Chassis")
-    self.addObject("MechanicalObject", name="position", template="Rigid3d", position=[[0,0,0,0,0,0,1]])
+    self.addObject("MechanicalObject", name="position", template="Rigid3d", position=[list(position)+[0,0,0,1]])
 
     #debug
     debug = self.addChild("Debug")
@@ -87,48 +129,55 @@ def Chassis():
                         input2=self.position.getLinkPath(),
                         output=sensors.position.getLinkPath())
 
-    ## Adds VisualModel for the chassis's body
+    if lod == "none":
+        return self
+
+    ## Adds VisualModel for the chassis's body
     visual = self.addChild("VisualModel")
-    parts = {
-        "Chassis" : ('meshes/summit_xl_chassis.stl', [0.1,0.1,0.1,1.0]) ,
-        "ChassisCover" : ('meshes/summit_xl_covers.stl', [0.8,0.8,0.8,1.0]),
-        "chassisSimple" : ('meshes/summit_xl_chassis_simple.stl', [0.5,0.5,0.5,1.0])
-    }
-    for name, (filepath, color) in parts.items():
+    for name, (filepath, color) in chassisParts.items():
         part = visual.addChild(name)
-        part.addObject('MeshSTLLoader', name='loader', filename=filepath, rotation=[-90,-90,0])
-        part.addObject('MeshTopology', src='@loader')
-        part.addObject('OglModel', name="renderer", src='@loader', color=color)
+        if meshes is None:
+            addMesh(part, filepath, name='loader', rotation=chassisRotation, lod=lod)
+            part.addObject('MeshTopology', src='@loader')
+            part.addObject('OglModel', name="renderer", src='@loader', color=color)
+        else:
+            part.addObject('OglModel', name="renderer", src=meshes.getChild(name).loader.getLinkPath(), color=color)
         part.addObject('RigidMapping', input=self.Wheels.position.getLinkPath(), index=0)
 
-    ## Add VisualModel for the wheels
+    ## Add VisualModel for the wheels
     visual = wheels.addChild("VisualModel")
-    visual.addObject('MeshSTLLoader', name='loader', filename='meshes/wheel.stl', rotation=[0,0,90])
-    visual.addObject('MeshTopology', name='geometry', src='@loader')
+    if meshes is None:
+        addMesh(visual, wheelMesh, name='loader', rotation=wheelRotation, lod=lod)
+        visual.addObject('MeshTopology', name='geometry', src='@loader')
+        geometry = visual.geometry
+    else:
+        geometry = meshes.Wheel.geometry
     for i in range(4):
         wheel = visual.addChild("Wheel{0}".format(i))
-        wheel.addObject("OglModel", src=visual.geometry.getLinkPath(), color=[0.2,0.2,0.2,1.0])
+        wheel.addObject("OglModel", src=geometry.getLinkPath(), color=[0.2,0.2,0.2,1.0])
         wheel.addObject("RigidMapping", input=self.Wheels.position.getLinkPath(), index=i+1)
 
 
-    ## Add VisualModel for the sensors
+    ## Add VisualModel for the sensors
     visual = sensors.addChild("VisualModel")
-    sensorfilepath = {
-        "lazer" : ('meshes/hokuyo_urg_04lx.stl', 1) ,
-        "gps" : ('meshes/antenna_3GO16.stl', 2),
-        "camera" : ('meshes/axis_p5514.stl',3),
-        "camera-RGBD" : ('meshes/orbbec_astra_embedded_s.stl', 4)
-    }
-
-    for name, (filepath, index) in sensorfilepath.items():
+    for name, (filepath, index) in sensorParts.items():
         visual_body = visual.addChild(name)
-        visual_body.addObject('MeshSTLLoader', name=name+'_loader', filename=filepath, rotation=[0,90,90])
-        visual_body.addObject('MeshTopology', src='@'+name+'_loader')
-        visual_body.addObject('OglModel', name=name+"_renderer", src='@'+name+'_loader', color=[0.2,0.2,0.2,1.0])
+        if meshes is None:
+            addMesh(visual_body, filepath, name=name+'_loader', rotation=sensorRotation,
+                    lod=lod)
+            visual_body.addObject('MeshTopology', src='@'+name+'_loader')
+            visual_body.addObject('OglModel', name=name+"_renderer", src='@'+name+'_loader', color=[0.2,0.2,0.2,1.0])
+        else:
+            visual_body.addObject('OglModel', name=name+"_renderer", src=meshes.getChild(name).loader.getLinkPath(),
+                                  color=[0.2,0.2,0.2,1.0])
         visual_body.addObject('RigidMapping', input=self.Sensors.position.getLinkPath(),index=index)
     return self
 
-def SummitXL(parentNode, name="SummitXL"):
+def SummitXL(parentNode, name="SummitXL", position=[0,0,0], meshes=None, lod="full", profile=None):
+    """The SummitXL robot, see Chassis for the arguments.
+       When profile is a filename, a SummitXLProfiler is added to the robot and
+       writes its timings in this file at exit (see summitxl_profiler).
+    """
     self = parentNode.addChild(name)
     self.addData(name="robot_linear_vel", value=[0.0, 0.0, 0.0],
                  type="Vec3d", help="Summit_xl velocity", group="Summitxl_cmd_vel")
@@ -145,6 +194,9 @@ def SummitXL(parentNode, name="SummitXL"):
     self.addData(name="linear_acceleration", value=[0.0, 0.0, 0.0],
                  type="Vec3d", help="Summit_xl imu", group="Summitxl_cmd_vel")
 
+    self.addData(name="angular_velocity", value=[0.0, 0.0, 0.0],
+                 type="Vec3d", help="Summit_xl imu", group="Summitxl_cmd_vel")
+
     self.addData(name="timestamp",value=[0, 0], type="vector<int>", help="Summit_xl imu",
                  group="Summitxl_cmd_vel")
 
@@ -154,27 +206,135 @@ def SummitXL(parentNode, name="SummitXL"):
     self.addData(name="reel_position",  value=[0.0, 0.0, 0.0],type="Vec3d",
                  help="Summit_xl odom", group="Summitxl_cmd_vel")
 
-    self.addChild(Chassis())
+    self.addChild(Chassis(position=position, meshes=meshes, lod=lod))
+    if profile is not None:
+        from summitxl_profiler import SummitXLProfiler
+        self.addObject(SummitXLProfiler(name="Profiler", robot=self, output=profile))
+    return self
+
+def fleetLayout(count, layout="grid", spacing=1.5):
+    """Returns the initial positions of count robots.
+
+    Args:
+        count (int): number of robots
+        layout: "grid", "line", "circle" or an explicit list of positions
+        spacing (float): distance between two neighbouring robots
+    """
+    if not isinstance(layout, str):
+        if len(layout) != count:
+            raise ValueError("The layout gives {0} positions for {1} robots".format(len(layout), count))
+        return [list(p) for p in layout]
+    if layout == "line":
+        return [[i*spacing, 0, 0] for i in range(count)]
+    if layout == "grid":
+        columns = int(ceil(sqrt(count)))
+        return [[(i % columns)*spacing, 0, (i // columns)*spacing] for i in range(count)]
+    if layout == "circle":
+        radius = max(spacing, count*spacing/(2*pi))
+        return [[radius*cos(2*pi*i/count), 0, radius*sin(2*pi*i/count)] for i in range(count)]
+    raise ValueError("Unknown fleet layout '{0}', expected grid, line, circle or a list of positions".format(layout))
+
+def SummitXLFleet(parentNode, count, layout="grid", spacing=1.5, name="SummitXLFleet", lod="full"):
+    """A group of SummitXL robots named SummitXL0, SummitXL1, ...
+
+       The meshes are parsed once in a MeshLibrary and their topology is shared by all
+       the robots, each robot only owns the vertex buffers of its visual models.
+
+    Args:
+        count (int): number of robots
+        layout: "grid", "line", "circle" or an explicit list of positions (see fleetLayout)
+        spacing (float): distance between two neighbouring robots
+        lod: level of detail of the visual models, "none" skips them
+    """
+    self = parentNode.addChild(name)
+    meshes = MeshLibrary(self, lod=lod) if lod != "none" else None
+    for i, position in enumerate(fleetLayout(count, layout, spacing)):
+        SummitXL(self, name="SummitXL{0}".format(i), position=position, meshes=meshes, lod=lod)
     return self
 
 def Floor(parentNode, color=[0.5, 0.5, 0.5, 1.], rotation=[0, 0, 0], translation=[0, 0, 0], scale=1):
     floor = parentNode.addChild('Floor')
-    floor.addObject('MeshObjLoader', name='loader', filename='mesh/square1.obj', scale=scale, rotation=rotation, translation=translation)
+    floor.addObject('MeshObjLoader', name='loader', filename='meshes/square.obj', scale=scale, rotation=rotation, translation=translation)
     floor.addObject('OglModel', src='@loader', color=color)
     floor.addObject('MeshTopology', src='@loader', name='topo')
     floor.addObject('MechanicalObject')
-    floor.addObject('TriangleCollisionModel')
-    floor.addObject('LineCollisionModel')
-    floor.addObject('PointCollisionModel')
+    # The floor is static, it is only tested against the moving models
+    floor.addObject('TriangleCollisionModel', moving=False, simulated=False)
+    floor.addObject('LineCollisionModel', moving=False, simulated=False)
+    floor.addObject('PointCollisionModel', moving=False, simulated=False)
     return floor
 
-def createScene(rootNode):
+def boxes(centers, size):
+    """Returns the positions and triangles of axis aligned boxes of the given size"""
+    centers = numpy.asarray(centers, dtype=numpy.float64).reshape(-1, 3)
+    corners = numpy.array([[(i >> 2) & 1, (i >> 1) & 1, i & 1] for i in range(8)], dtype=numpy.float64) - 0.5
+    corners *= size
+    positions = (centers[:, None, :] + corners[None, :, :]).reshape(-1, 3)
+    triangles = (boxTriangles[None, :, :] + 8 * numpy.arange(len(centers))[:, None, None]).reshape(-1, 3)
+    return positions, triangles
+
+def StaticMesh(parentNode, name, positions, triangles, color=[0.6, 0.4, 0.2, 1.]):
+    """A static collision mesh, with a visual model"""
+    self = parentNode.addChild(name)
+    topology = self.addObject('MeshTopology', name='topo')
+    topology.position.value = positions
+    topology.triangles.value = triangles
+    self.addObject('MechanicalObject')
+    self.addObject('TriangleCollisionModel', moving=False, simulated=False)
+    self.addObject('LineCollisionModel', moving=False, simulated=False)
+    self.addObject('PointCollisionModel', moving=False, simulated=False)
+    self.addObject('OglModel', src='@topo', color=color)
+    return self
+
+def Obstacles(parentNode, count=100, area=[-4, -4, 4, 4], size=[0.3, 0.5, 0.3], height=-0.12, merged=True,
+              seed=0, positions=None, name="Obstacles"):
+    """Static box obstacles standing on the floor.
+
+    Args:
+        count (int): number of obstacles placed at random in the area
+        area: [xmin, zmin, xmax, zmax] of the random positions
+        size: size of the boxes along x, y, z
+        height (float): height of the floor
+        merged (bool): all the boxes in one mesh (a single collision model whose
+                       bounding tree separates the boxes) instead of one node each
+        seed (int): seed of the random positions
+        positions: explicit [x, z] positions of the obstacles, replaces count and area
+    """
+    self = parentNode.addChild(name)
+    if positions is None:
+        rng = numpy.random.default_rng(seed)
+        positions = rng.uniform(area[0:2], area[2:4], (count, 2))
+    positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 2)
+    centers = numpy.column_stack([positions[:, 0], numpy.full(len(positions), height + size[1] / 2.), positions[:, 1]])
+    if merged:
+        StaticMesh(self, "Merged", *boxes(centers, size))
+    else:
+        for i, center in enumerate(centers):
+            StaticMesh(self, "Obstacle{0}".format(i), *boxes(center, size))
+    return self
+
+def createScene(rootNode, sink=None, lod="full", profile=None, dt=0.001, gravity=[0., -9810., 0.], timeline=None,
+                **controllerArgs):
+    """Creates the summit_xl scene driven by the keyboard.
+
+    Args:
+        sink: where the controller sends the chassis pose at each step
+              (see summitxl_posesink), the pose is printed when None
+        lod: level of detail of the robot visual models (see summitxl_meshlod)
+        profile: file where the step timings are written at exit (see summitxl_profiler)
+        dt (float): time step of the simulation
+        gravity: gravity vector of the scene
+        timeline: a command timeline (or its .npy file) played in place of the keyboard
+                  (see summitxl_timeline)
+        controllerArgs: extra arguments of the SummitxlController (speed, turn, wheelRadius)
+    """
+    from stlib3.scene import Scene
     scene = Scene(rootNode)
     scene.addMainHeader()
-    scene.dt = 0.001
-    scene.gravity = [0., -9810., 0.]
+    scene.dt = dt
+    scene.gravity = gravity
 
-    SummitXL(scene.Modelling)
+    SummitXL(scene.Modelling, lod=lod, profile=profile)
     Floor(scene.Modelling, rotation=[90,0,0], translation=[-2,-0.12,-2], scale=4)
 
     #def myAnimation(target, body, factor):
@@ -185,7 +345,11 @@ def createScene(rootNode):
     #        "body" : scene.Modelling.SummitXL.Chassis.position,
     #        "target": scene.Modelling.SummitXL.Chassis.WheelsMotors.angles}, duration=2, mode="loop")
 
-    scene.Modelling.SummitXL.addObject(SummitxlController(name="KeyboardController", robot=scene.Modelling.SummitXL))
+    if timeline is not None:
+        scene.Modelling.SummitXL.addObject(TimelinePlayback(name="TimelinePlayback", robot=scene.Modelling.SummitXL,
+                                                            timeline=timeline))
+    scene.Modelling.SummitXL.addObject(SummitxlController(name="KeyboardController", robot=scene.Modelling.SummitXL,
+                                                          sink=sink, **controllerArgs))
 
     scene.Simulation.addChild(scene.Modelling)
 
@@ -0,0 +1,135 @@
+"""Bounding volume hierarchy over static triangles, for batched ray casts.
+
+The tree is built once with median splits along the longest axis of the
+triangle centroids and stored in flat arrays. A batch of rays goes down the
+tree together: at each node, the rays missing its box are dropped, so that
+each leaf only tests the rays that can hit its triangles, with one
+vectorized Moller-Trumbore test of these rays against the leaf triangles.
+
+    bvh = TriangleBVH(positions, triangles)
+    distances = bvh.raycast(origin, directions, maxDistance=5.)
+"""
+import numpy
+
+
+class TriangleBVH(object):
+    """Static triangle BVH.
+
+    Args:
+        positions: (n, 3) vertex positions
+        triangles: (m, 3) vertex indices of the triangles
+        leafSize (int): maximum number of triangles of a leaf
+    """
+    def __init__(self, positions, triangles, leafSize=8):
+        positions = numpy.asarray(positions, dtype=numpy.float64).reshape(-1, 3)
+        triangles = numpy.asarray(triangles, dtype=numpy.int64).reshape(-1, 3)
+        corners = positions[triangles]
+        centroids = corners.mean(axis=1)
+        lower, upper = corners.min(axis=1), corners.max(axis=1)
+
+        order = []
+        boxes, children, ranges = [], [], []
+
+        # Depth first construction with an explicit stack of (node, triangle indices)
+        def newNode():
+            boxes.append(None)
+            children.append([-1, -1])
+            ranges.append([0, 0])
+            return len(boxes) - 1
+
+        stack = [(newNode(), numpy.arange(len(triangles)))]
+        while stack:
+            node, indices = stack.pop()
+            boxes[node] = (lower[indices].min(axis=0), upper[indices].max(axis=0)) if len(indices) else \
+                (numpy.full(3, numpy.inf), numpy.full(3, -numpy.inf))
+            if len(indices) <= leafSize:
+                ranges[node] = [len(order), len(indices)]
+                order.extend(indices.tolist())
+                continue
+            c = centroids[indices]
+            axis = int(numpy.argmax(c.max(axis=0) - c.min(axis=0)))
+            half = len(indices) // 2
+            split = numpy.argpartition(c[:, axis], half)
+            left, right = newNode(), newNode()
+            children[node] = [left, right]
+            stack.append((right, indices[split[half:]]))
+            stack.append((left, indices[split[:half]]))
+
+        self.lower = numpy.array([box[0] for box in boxes])
+        self.upper = numpy.array([box[1] for box in boxes])
+        self.children = numpy.array(children, dtype=numpy.int64)
+        self.ranges = numpy.array(ranges, dtype=numpy.int64)
+
+        order = numpy.array(order, dtype=numpy.int64)
+        self.v0 = corners[order, 0]
+        self.e1 = corners[order, 1] - self.v0
+        self.e2 = corners[order, 2] - self.v0
+
+    def __len__(self):
+        return len(self.v0)
+
+    def raycast(self, origin, directions, maxDistance=numpy.inf, out=None):
+        """Returns the distance along each ray to the closest triangle, maxDistance when
+           there is none.
+
+        Args:
+            origin: (3,) common origin of the rays
+            directions: (k, 3) unit directions of the rays
+            maxDistance (float): rays are cast up to this distance
+            out: optional (k,) array receiving the distances
+        """
+        origin = numpy.asarray(origin, dtype=numpy.float64)
+        directions = numpy.asarray(directions, dtype=numpy.float64)
+        best = out if out is not None else numpy.empty(len(directions))
+        best.fill(maxDistance)
+        if len(self.v0) == 0:
+            return best
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            inverse = 1. / directions
+        lower, upper, children, ranges = self.lower, self.upper, self.children, self.ranges
+
+        stack = [(0, numpy.arange(len(directions)))]
+        while stack:
+            node, rays = stack.pop()
+            # slab test of the rays against the node box
+            with numpy.errstate(invalid="ignore"):
+                t0 = (lower[node] - origin) * inverse[rays]
+                t1 = (upper[node] - origin) * inverse[rays]
+            near = numpy.nanmax(numpy.minimum(t0, t1), axis=1)
+            far = numpy.nanmin(numpy.maximum(t0, t1), axis=1)
+            hit = (far >= numpy.maximum(near, 0.)) & (near < best[rays])
+            rays = rays[hit]
+            if len(rays) == 0:
+                continue
+
+            left, right = children[node]
+            if left >= 0:
+                stack.append((right, rays))
+                stack.append((left, rays))
+                continue
+
+            start, count = ranges[node]
+            if count:
+                distances = self.intersect(origin, directions[rays], slice(start, start + count))
+                numpy.minimum(best[rays], distances, out=distances)
+                best[rays] = distances
+        return best
+
+    def intersect(self, origin, directions, triangles):
+        """Moller-Trumbore test of k rays against a slice of triangles, returns the
+           (k,) distance to the closest one, inf when there is none
+        """
+        v0, e1, e2 = self.v0[triangles], self.e1[triangles], self.e2[triangles]
+        p = numpy.cross(directions[:, None, :], e2[None, :, :])
+        det = numpy.einsum("tj,rtj->rt", e1, p)
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            inverse = 1. / det
+            s = origin - v0
+            u = numpy.einsum("tj,rtj->rt", s, p) * inverse
+            q = numpy.cross(s, e1)
+            v = numpy.einsum("rj,tj->rt", directions, q) * inverse
+            t = numpy.einsum("tj,tj->t", e2, q)[None, :] * inverse
+            valid = (numpy.abs(det) > 1e-12) & (u >= 0.) & (v >= 0.) & (u + v <= 1.) & (t > 0.)
+        t = numpy.where(valid, t, numpy.inf)
+        return t.min(axis=1)
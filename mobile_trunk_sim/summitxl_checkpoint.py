@@ -0,0 +1,148 @@
+"""Checkpoint and warm-start of the state of a SummitXL.
+
+A checkpoint is a small binary file: a header (magic, version, number of
+values) followed by one float64 vector laid out as:
+
+    chassis                Chassis.position            7
+    wheels                 WheelsMotors.angles         5
+    sensors                FixedSensor.angles          5
+    <robot Data fields>    see dataFields              3, 4 or 2 each
+    <controller fields>    see controllerFields        1 each
+    <command buffer>       count, now, times, values   only when the controller has one
+
+The controller fields that are None or missing are stored as NaN. The command
+buffer (see summitxl_cmdbuffer) is stored whole, so that the commands received
+before the checkpoint are still interpolated after it. Restoring
+is a single read of a few hundred bytes followed by bulk copies in the Data
+fields, so many sweep workers can warm-start from the same file. The
+summitxl_controller.Checkpointer restores and saves them in a scene:
+
+    robot.addObject(Checkpointer(name="Checkpointer", robot=robot, controller=controller,
+                                 restore="run.ckpt", output="run.ckpt", period=10.))
+"""
+import math
+import os
+import struct
+import numpy
+
+magic = b"SXLC"
+version = 2
+header = struct.Struct("<4sII")
+
+stateFields = [("chassis", 7), ("wheels", 5), ("sensors", 5)]
+dataFields = [("robot_linear_vel", 3), ("robot_angular_vel", 3), ("sim_orientation", 4), ("reel_orientation", 4),
+              ("linear_acceleration", 3), ("angular_velocity", 3), ("timestamp", 2), ("sim_position", 3),
+              ("reel_position", 3)]
+# time_now and flag of the SummitxlROSController, time of the SummitxlController,
+# last odometry time of the PoseEstimator
+controllerFields = ["time_now", "flag", "simtime", "time", "estimator_last"]
+
+size = sum(n for _, n in stateFields) + sum(n for _, n in dataFields) + len(controllerFields)
+
+
+def commandBuffer(controller):
+    return getattr(controller, "commands", None) if controller is not None else None
+
+
+def stateSize(controller=None):
+    """Number of values of the snapshot of a robot and of its controller"""
+    commands = commandBuffer(controller)
+    return size + (2 + commands.times.size + commands.values.size if commands is not None else 0)
+
+
+def stateData(robot):
+    """The Data fields holding the Chassis, WheelsMotors and FixedSensor states"""
+    chassis = robot.Chassis
+    return [chassis.position.position, chassis.WheelsMotors.angles.position, chassis.FixedSensor.angles.position]
+
+
+def controllerValue(controller, name):
+    if controller is None:
+        return None
+    if name == "estimator_last":
+        estimator = getattr(controller, "estimator", None)
+        return estimator.last if estimator is not None else None
+    return getattr(controller, name, None)
+
+
+def snapshot(robot, controller=None, out=None):
+    """Returns the state of the robot and of its controller as a float64 vector"""
+    state = out if out is not None else numpy.empty(stateSize(controller))
+    i = 0
+    for data, (_, n) in zip(stateData(robot), stateFields):
+        state[i:i + n] = numpy.ravel(data.value)
+        i += n
+    for name, n in dataFields:
+        state[i:i + n] = numpy.ravel(robot.findData(name).value)
+        i += n
+    for name in controllerFields:
+        value = controllerValue(controller, name)
+        state[i] = float(value) if value is not None else math.nan
+        i += 1
+    commands = commandBuffer(controller)
+    if commands is not None:
+        state[i:i + 2] = commands.count, commands.now
+        i += 2
+        for array in (commands.times, commands.values):
+            state[i:i + array.size] = array.ravel()
+            i += array.size
+    return state
+
+
+def restore(robot, state, controller=None):
+    """Sets the state of the robot and of its controller from a snapshot"""
+    # the command buffer is skipped when the controller has none, and left as is when
+    # the checkpoint has none
+    expected = stateSize(controller)
+    if len(state) < size or (len(state) > size and commandBuffer(controller) is not None and len(state) != expected):
+        raise ValueError("Expected a state of {0} values, got {1}".format(expected, len(state)))
+    i = 0
+    for data, (_, n) in zip(stateData(robot), stateFields):
+        with data.writeable() as value:
+            value.reshape(-1)[:] = state[i:i + n]
+        i += n
+    for name, n in dataFields:
+        values = state[i:i + n]
+        robot.findData(name).value = values.astype(int).tolist() if name == "timestamp" else values
+        i += n
+    if controller is None:
+        return
+    for name in controllerFields:
+        value = state[i]
+        i += 1
+        if name == "estimator_last":
+            if getattr(controller, "estimator", None) is not None:
+                controller.estimator.last = None if math.isnan(value) else float(value)
+        elif name == "time_now" and hasattr(controller, name):
+            controller.time_now = None if math.isnan(value) else float(value)
+        elif name == "flag" and hasattr(controller, name) and not math.isnan(value):
+            controller.flag = bool(value)
+        elif hasattr(controller, name) and not math.isnan(value):
+            setattr(controller, name, float(value))
+    commands = commandBuffer(controller)
+    if commands is not None and len(state) > size:
+        commands.count, commands.now = int(state[i]), float(state[i + 1])
+        i += 2
+        for array in (commands.times, commands.values):
+            array.reshape(-1)[:] = state[i:i + array.size]
+            i += array.size
+
+
+def save(filename, state):
+    """Writes a snapshot, through a temporary file so that a crash never leaves a partial checkpoint"""
+    state = numpy.ascontiguousarray(state, dtype="<f8")
+    temporary = filename + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(header.pack(magic, version, len(state)))
+        file.write(state.tobytes())
+    os.replace(temporary, filename)
+
+
+def load(filename):
+    """Reads a snapshot written by save()"""
+    with open(filename, "rb") as file:
+        data = file.read()
+    tag, fileversion, count = header.unpack_from(data)
+    if tag != magic or fileversion != version:
+        raise ValueError("{0} is not a SummitXL checkpoint of version {1}".format(filename, version))
+    return numpy.frombuffer(data, dtype="<f8", count=count, offset=header.size)
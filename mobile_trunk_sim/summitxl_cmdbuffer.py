@@ -0,0 +1,89 @@
+"""Timestamped command buffer smoothing a jittery cmd_vel stream.
+
+The received commands are stored with their reception time in a small ring
+buffer. The times are simulated times: the controller sets the buffer 'now'
+at each step and the received commands are stamped with it, so that a run
+does not depend on the wall clock. At each simulation step, the controller
+samples the buffer at 'now - delay': the commanded value is linearly
+interpolated between the two surrounding commands, and the newest command is
+held after its time. cmd_vel being a step signal (the teleop only publishes
+on keypress), it is never extrapolated. With a delay of about one network
+period, bursty delivery no longer shows in the motion and the simulation
+rate does not have to match the network rate.
+
+    commands = CommandBuffer()
+    velrecv = bufferedRecv(commands, vel_recv)
+    SummitxlROSController(name="KeyboardController", robot=robot, commands=commands, commandDelay=0.05)
+"""
+import numpy
+
+
+class CommandBuffer(object):
+    """Ring buffer of the last 'size' timestamped values.
+
+    Args:
+        size (int): number of values kept
+        width (int): size of a value, 6 for [linear, angular] twists
+    """
+    def __init__(self, size=16, width=6):
+        self.times = numpy.zeros(size)
+        self.values = numpy.zeros((size, width))
+        self.size = size
+        self.count = 0
+        # Simulated time of the current step, set by the controller
+        self.now = 0.
+
+    def push(self, t, value):
+        """Adds a value received at time t, values older than the last one are ignored"""
+        if self.count > 0 and t < self.times[(self.count - 1) % self.size]:
+            return
+        i = self.count % self.size
+        self.times[i] = t
+        self.values[i] = value
+        self.count += 1
+
+    def sample(self, t, out):
+        """Fills out with the value at time t, out is left unchanged when the buffer is empty"""
+        n = min(self.count, self.size)
+        if n == 0:
+            return out
+        first = self.count - n
+        oldest, newest = first % self.size, (self.count - 1) % self.size
+        if t >= self.times[newest]:
+            out[:] = self.values[newest]
+            return out
+        if t <= self.times[oldest]:
+            out[:] = self.values[oldest]
+            return out
+
+        # the newest value older than t, searched from the newest one
+        k = self.count - 2
+        while self.times[k % self.size] > t:
+            k -= 1
+        older, newer = k % self.size, (k + 1) % self.size
+
+        t0, t1 = self.times[older], self.times[newer]
+        ratio = (t - t0) / (t1 - t0) if t1 > t0 else 1.
+        numpy.subtract(self.values[newer], self.values[older], out=out)
+        out *= ratio
+        out += self.values[older]
+        return out
+
+
+def bufferedRecv(buffer, recv, clock=None):
+    """Returns a receiving function calling recv (e.g. vel_recv) and pushing the values
+       it wrote in its Data fields in the buffer, stamped with the reception time.
+       The time is the simulated time of the buffer ('now') unless a clock is given.
+    """
+    value = numpy.zeros(buffer.values.shape[1])
+    clock = clock if clock is not None else (lambda: buffer.now)
+
+    def fn(data, datafield):
+        recv(data, datafield)
+        i = 0
+        for field in datafield:
+            v = numpy.ravel(field.value)
+            value[i:i + len(v)] = v
+            i += len(v)
+        buffer.push(clock(), value)
+    return fn
@@ -1,9 +1,10 @@
+import atexit
+import numpy
 import Sofa
-from splib3.numerics import RigidDof, Quat
-from splib3.animation import animate
-from splib3.constants import Key
-from stlib3.scene import Scene
-from math import *
+import summitxl_checkpoint
+import summitxl_kinematics
+from summitxl_posesink import PrintSink
+from summitxl_timeline import CommandTimeline, TimelineCursor
 
 msg = """
 This node takes keypresses from the keyboard and publishes them
@@ -48,16 +49,26 @@ def vels(speed, turn):
 class SummitxlController(Sofa.Core.Controller):
     """A Simple keyboard controller for the SummitXL
        Key UP, DOWN, LEFT, RIGHT to move
+
+       The chassis pose is sent at each step to the 'sink' argument
+       (see summitxl_posesink), it is printed by default. The initial 'speed'
+       and 'turn' and the 'wheelRadius' can be given as arguments.
     """
     def __init__(self, *args, **kwargs):
+        sink = kwargs.pop("sink", None)
+        speed = kwargs.pop("speed", 0.1)
+        turn = kwargs.pop("turn", 0.1)
+        wheelRadius = kwargs.pop("wheelRadius", summitxl_kinematics.wheelRadius)
         Sofa.Core.Controller.__init__(self, *args, **kwargs)
         self.robot = kwargs["robot"]
-        self.wheel_ray = 0.0015
+        self.sink = sink if sink is not None else PrintSink()
+        self.wheels = summitxl_kinematics.SkidSteerWheels.fromChassis(self.robot.Chassis, wheelRadius)
         self.dt = 0
+        self.time = 0.
 
         self.status = 0.
-        self.speed = 0.1
-        self.turn = 0.1
+        self.speed = speed
+        self.turn = turn
         self.x = 0.0
         self.y = 0.0
         self.z = 0.0
@@ -67,35 +78,18 @@ class SummitxlController(Sofa.Core.Controller):
 
     def move(self, fwd, angle):
         """Move the robot using the forward speed and angular speed)"""
-        robot = RigidDof(self.robot.Chassis.position)
-        robot.translate(robot.forward * fwd)
-        robot.rotateAround([0, 1, 0], angle)
-
-        with self.robot.Chassis.WheelsMotors.angles.position.writeable() as angles:
-            #Make the wheel turn according to forward speed
-            # TODO: All the value are random, need to be really calculated
-            angles += (fwd/self.wheel_ray)
-            #Make the wheel turn in reverse mode according to turning speed
-            # TODO: the value are random, need to be really calculated
-            angles[0] += (angle)
-            angles[2] += (angle)
-            angles[1] -= (angle)
-            angles[3] -= (angle)
+        with self.robot.Chassis.position.position.writeable() as pose:
+            with self.robot.Chassis.WheelsMotors.angles.position.writeable() as angles:
+                summitxl_kinematics.move(pose[0], angles, fwd, angle, self.wheels)
 
     def onAnimateBeginEvent(self, event):
         """At each time step we move the robot by the given forward_speed and angular_speed)
            TODO: normalize the speed by the dt so it is a real speed
         """
         self.dt = event['dt']
+        self.time += self.dt
         self.move(self.robot.simrobot_linear_vel[0] , self.robot.simrobot_angular_vel[2])
-        print("position x = ",self.robot.Chassis.position.position.value[0][0])
-        print("position y = ",self.robot.Chassis.position.position.value[0][1])
-        print("position z = ",self.robot.Chassis.position.position.value[0][2])
-        print("\n")
-        print("orientation x = ",self.robot.Chassis.position.position.value[0][3])
-        print("orientation y = ",self.robot.Chassis.position.position.value[0][4])
-        print("orientation z = ",self.robot.Chassis.position.position.value[0][5])
-        print("orientation w = ",self.robot.Chassis.position.position.value[0][6])
+        self.sink.write(self.time, self.robot.Chassis.position.position.value[0])
 
 
 
@@ -130,3 +124,129 @@ class SummitxlController(Sofa.Core.Controller):
         if key in moveBindings.keys() or key in speedBindings.keys():
             self.robot.simrobot_linear_vel[0]= 0
             self.robot.simrobot_angular_vel[2] = 0
+
+
+class FleetController(Sofa.Core.Controller):
+    """Moves all the SummitXL of a SummitXLFleet in one batched update
+       (see summitxl_kinematics.FleetKinematics).
+
+       Each robot is driven, as with the SummitxlController, by its
+       simrobot_linear_vel[0] and simrobot_angular_vel[2] displacements,
+       e.g. written by a TimelinePlayback. It must be visited after the
+       robots, in a child node added after them.
+
+    Args:
+        fleet: the SummitXLFleet node
+        wheelRadius (float): radius of the wheels
+    """
+    def __init__(self, *args, **kwargs):
+        wheelRadius = kwargs.pop("wheelRadius", summitxl_kinematics.wheelRadius)
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        self.robots = [robot for robot in kwargs["fleet"].children if robot.name.value.startswith("SummitXL")]
+        for robot in self.robots:
+            robot.simrobot_angular_vel = [0., 0., 0.]
+            robot.simrobot_linear_vel = [0., 0., 0.]
+        if not self.robots:
+            raise ValueError("The node {0} holds no SummitXL".format(kwargs["fleet"].name.value))
+        count = len(self.robots)
+        wheels = summitxl_kinematics.SkidSteerWheels.fromChassis(self.robots[0].Chassis, wheelRadius)
+        self.kinematics = summitxl_kinematics.FleetKinematics(count, wheels)
+        self.poses = numpy.empty((count, 7))
+        self.angles = numpy.empty((count, len(wheels.jacobian)))
+        self.fwd = numpy.empty(count)
+        self.angle = numpy.empty(count)
+
+    def onAnimateBeginEvent(self, event):
+        for i, robot in enumerate(self.robots):
+            self.poses[i] = robot.Chassis.position.position.value[0]
+            self.angles[i] = robot.Chassis.WheelsMotors.angles.position.value.reshape(-1)
+            self.fwd[i] = robot.simrobot_linear_vel[0]
+            self.angle[i] = robot.simrobot_angular_vel[2]
+
+        self.kinematics.step(self.poses, self.angles, self.fwd, self.angle)
+
+        for i, robot in enumerate(self.robots):
+            with robot.Chassis.position.position.writeable() as pose:
+                pose[0] = self.poses[i]
+            with robot.Chassis.WheelsMotors.angles.position.writeable() as angles:
+                angles.reshape(-1)[:] = self.angles[i]
+
+
+class TimelinePlayback(Sofa.Core.Controller):
+    """Drives the SummitxlController of a robot from a command timeline.
+
+    It writes the commands in the simrobot_linear_vel and simrobot_angular_vel
+    fields as the keyboard does, so it must be added before the SummitxlController.
+
+    Args:
+        robot: the SummitXL node
+        timeline: a CommandTimeline or the .npy file of one
+    """
+    def __init__(self, *args, **kwargs):
+        timeline = kwargs.pop("timeline")
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        self.robot = kwargs["robot"]
+        self.timeline = CommandTimeline.load(timeline) if isinstance(timeline, str) else timeline
+        self.cursor = TimelineCursor(self.timeline)
+        self.time = 0.
+
+    def onAnimateBeginEvent(self, event):
+        dt = event['dt']
+        i = self.cursor.seek(self.time)
+        self.time += dt
+        if i < 0:
+            linear, angular = 0., 0.
+        else:
+            linear, angular = self.timeline.linear[i], self.timeline.angular[i]
+        self.robot.simrobot_linear_vel[0] = float(linear) * dt
+        self.robot.simrobot_angular_vel[2] = float(angular) * dt
+
+
+class Checkpointer(Sofa.Core.Controller):
+    """Restores the robot from a checkpoint when the simulation starts and saves it periodically.
+
+    Args:
+        robot: the SummitXL node
+        controller: the controller whose internals are saved with the robot
+                    (SummitxlROSController or SummitxlController)
+        restore: checkpoint file or snapshot restored when the simulation starts
+        output (str): checkpoint file written every 'period' seconds of simulated time
+                      and at the end, nothing is written when None
+        period (float): time between two checkpoints
+    """
+    def __init__(self, *args, **kwargs):
+        self.controller = kwargs.pop("controller", None)
+        state = kwargs.pop("restore", None)
+        self.output = kwargs.pop("output", None)
+        self.period = kwargs.pop("period", 10.)
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        self.robot = kwargs["robot"]
+        self.state = summitxl_checkpoint.load(state) if isinstance(state, str) else state
+        self.buffer = numpy.empty(summitxl_checkpoint.stateSize(self.controller))
+        self.elapsed = 0.
+        if self.output is not None:
+            atexit.register(self.checkpoint)
+
+    def warmStart(self):
+        if self.state is not None:
+            summitxl_checkpoint.restore(self.robot, self.state, self.controller)
+            self.state = None
+
+    def onSimulationInitDoneEvent(self, event):
+        self.warmStart()
+
+    def onAnimateBeginEvent(self, event):
+        # in case the init event was not received
+        self.warmStart()
+
+    def onAnimateEndEvent(self, event):
+        if self.output is None:
+            return
+        self.elapsed += event['dt']
+        if self.elapsed >= self.period:
+            self.elapsed = 0.
+            self.checkpoint()
+
+    def checkpoint(self, filename=None):
+        """Saves the current state"""
+        summitxl_checkpoint.save(filename or self.output, summitxl_checkpoint.snapshot(self.robot, self.controller, self.buffer))
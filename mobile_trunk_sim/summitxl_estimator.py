@@ -0,0 +1,66 @@
+"""Complementary filter keeping the simulated SummitXL locked on the real robot.
+
+The prediction is the open loop integration of cmd_vel done by the controller
+(summitxl_kinematics.move), the correction pulls the chassis pose toward the
+real robot odometry each time a new one is received:
+
+    pose += (1 - exp(-dt / timeConstant)) * (odom - pose)
+
+where dt is the time between two odometry messages. The first odometry
+initializes the pose. The robot being planar, its orientation is handled as
+a yaw angle around Y.
+"""
+from math import atan2, sin, cos, exp, pi
+
+
+def yawOf(q):
+    """Returns the rotation around Y of a [qx, qy, qz, qw] quaternion"""
+    return 2. * atan2(q[1], q[3])
+
+
+class PoseEstimator(object):
+    """Fuses the integrated cmd_vel with the real robot odometry.
+
+    Args:
+        timeConstant (float): time in seconds for the pose to converge on the
+                              odometry, a small value follows the odometry closely
+    """
+    def __init__(self, timeConstant=0.5):
+        self.timeConstant = timeConstant
+        self.last = None
+        # Last difference between the odometry and the estimated pose [x, y, z, yaw]
+        self.error = [0., 0., 0., 0.]
+
+    def reset(self):
+        self.last = None
+
+    def correct(self, pose, position, orientation, stamp):
+        """Corrects the pose with a new odometry.
+
+        Args:
+            pose: the chassis Rigid3d pose, updated in place
+            position: the real robot position (reel_position)
+            orientation: the real robot orientation (reel_orientation)
+            stamp (float): time of the odometry in seconds, the same odometry given
+                           twice is only used once
+        """
+        if self.last is None:
+            pose[0], pose[1], pose[2] = position[0], position[1], position[2]
+            pose[3], pose[4], pose[5], pose[6] = orientation[0], orientation[1], orientation[2], orientation[3]
+            self.last = stamp
+            return
+        dt = stamp - self.last
+        if dt <= 0.:
+            return
+        self.last = stamp
+        alpha = 1. - exp(-dt / self.timeConstant)
+
+        error = self.error
+        for i in range(3):
+            error[i] = position[i] - pose[i]
+            pose[i] += alpha * error[i]
+
+        yaw = 2. * atan2(pose[4], pose[6])
+        error[3] = (yawOf(orientation) - yaw + pi) % (2. * pi) - pi
+        yaw += alpha * error[3]
+        pose[3], pose[4], pose[5], pose[6] = 0., sin(yaw * 0.5), 0., cos(yaw * 0.5)
@@ -0,0 +1,243 @@
+"""IMU model of the SummitXL computed from the motion of a Sensors frame.
+
+At the end of each step the pose of the frame is pushed in a small history
+buffer, then:
+
+    angular velocity     from the rotation between the last two orientations
+    linear acceleration  from the second difference of the last three positions,
+                         minus gravity (the specific force an accelerometer
+                         measures), in the frame of the sensor
+
+The values are written in the 'angular_velocity' and 'linear_acceleration'
+Data fields of the robot. When a rate is given, the model also produces the
+samples of a regular output clock that can be faster than the simulation:
+between two steps the samples are linearly interpolated (normalized for the
+orientation), then the optional bias and white noise are added. These samples
+are handed to the 'output' function, e.g. an ImuStream publishing them:
+
+    robot.addObject(ImuModel(name="Imu", robot=robot, rate=200., stamp=robot.findData("timestamp"),
+                             output=ImuStream(transport.node, "/sofa_sim/imu/data")))
+
+The samples are stamped with the simulated time, or, when a 'stamp' Data field
+is given, on its clock: the robot 'timestamp' at the end of the step, minus
+the age of the sample in the step. This is the clock of the odom and scan
+messages.
+"""
+import queue
+import threading
+import numpy
+import Sofa
+from sensor_msgs.msg import Imu
+
+
+def quatMultiply(a, b, out):
+    """out = a * b for [x, y, z, w] quaternions"""
+    ax, ay, az, aw = a
+    bx, by, bz, bw = b
+    out[0] = aw * bx + ax * bw + ay * bz - az * by
+    out[1] = aw * by - ax * bz + ay * bw + az * bx
+    out[2] = aw * bz + ax * by - ay * bx + az * bw
+    out[3] = aw * bw - ax * bx - ay * by - az * bz
+    return out
+
+
+def rotateInverse(q, v):
+    """Rotates the vector v by the inverse of the quaternion q = [x, y, z, w]"""
+    u, w = -numpy.asarray(q[:3]), q[3]
+    t = 2. * numpy.cross(u, v)
+    return v + w * t + numpy.cross(u, t)
+
+
+class ImuModel(Sofa.Core.Controller):
+    """Synthesizes the IMU measures from the successive poses of a Sensors frame.
+
+    Args:
+        robot: the SummitXL node
+        index (int): entry of Sensors.position carrying the IMU, 0 is the root of the
+                     sensors chain (the chassis origin)
+        history (int): number of poses kept, at least 3
+        gravity: gravity in the units of the robot positions (m/s^2)
+        rate (float): output samples per second of simulated time, None produces no samples
+        output: function called with (times, orientations, angularVelocities, linearAccelerations)
+                arrays of the samples of each step
+        gyroNoise (float): standard deviation of the angular velocity noise
+        accelNoise (float): standard deviation of the linear acceleration noise
+        gyroBias: constant bias of the angular velocity
+        accelBias: constant bias of the linear acceleration
+        seed (int): seed of the noise
+        stamp: [sec, nanosec] Data field whose clock stamps the samples, None uses
+               the simulated time
+    """
+    def __init__(self, *args, **kwargs):
+        index = kwargs.pop("index", 0)
+        history = max(3, kwargs.pop("history", 3))
+        gravity = kwargs.pop("gravity", [0., -9.81, 0.])
+        rate = kwargs.pop("rate", None)
+        output = kwargs.pop("output", None)
+        gyroNoise = kwargs.pop("gyroNoise", 0.)
+        accelNoise = kwargs.pop("accelNoise", 0.)
+        gyroBias = kwargs.pop("gyroBias", [0., 0., 0.])
+        accelBias = kwargs.pop("accelBias", [0., 0., 0.])
+        seed = kwargs.pop("seed", None)
+        self.stamp = kwargs.pop("stamp", None)
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        self.robot = kwargs["robot"]
+        self.index = index
+        self.gravity = numpy.array(gravity, dtype=numpy.float64)
+        self.period = 1. / rate if rate else None
+        self.output = output
+        self.noise = numpy.array([gyroNoise] * 3 + [accelNoise] * 3)
+        self.bias = numpy.concatenate([gyroBias, accelBias]).astype(numpy.float64)
+        self.rng = numpy.random.default_rng(seed)
+
+        self.times = numpy.zeros(history)
+        self.positions = numpy.zeros((history, 3))
+        self.orientations = numpy.zeros((history, 4))
+        self.count = 0
+        self.time = 0.
+        self.delta = numpy.zeros(4)
+
+        # measures [wx, wy, wz, ax, ay, az] and orientation at the last two steps
+        self.measure = numpy.zeros(6)
+        self.previous = numpy.zeros(6)
+        self.orientation = numpy.array([0., 0., 0., 1.])
+        self.previousOrientation = numpy.array([0., 0., 0., 1.])
+        self.nextSample = 0.
+
+    def push(self, t, pose):
+        i = self.count % len(self.times)
+        self.times[i] = t
+        self.positions[i] = pose[0:3]
+        self.orientations[i] = pose[3:7]
+        self.count += 1
+
+    def last(self, k):
+        """Index of the k-th last sample, 0 being the newest"""
+        return (self.count - 1 - k) % len(self.times)
+
+    def update(self):
+        """Computes the measures from the history, returns False until there are enough poses"""
+        if self.count < 2:
+            return False
+        i2, i1 = self.last(0), self.last(1)
+        t1, t2 = self.times[i1], self.times[i2]
+        q1, q2 = self.orientations[i1], self.orientations[i2]
+        dt = t2 - t1
+        if dt <= 0.:
+            return False
+
+        # angular velocity in the sensor frame: rotation from q1 to q2 = q1^-1 * q2
+        delta = quatMultiply([-q1[0], -q1[1], -q1[2], q1[3]], q2, self.delta)
+        if delta[3] < 0.:
+            delta *= -1.
+        sine = numpy.linalg.norm(delta[:3])
+        if sine > 1e-12:
+            self.measure[0:3] = delta[:3] * (2. * numpy.arctan2(sine, delta[3]) / (sine * dt))
+        else:
+            self.measure[0:3] = delta[:3] * (2. / dt)
+
+        # specific force in the sensor frame
+        acceleration = -self.gravity
+        if self.count >= 3:
+            i0 = self.last(2)
+            t0 = self.times[i0]
+            p0, p1, p2 = self.positions[i0], self.positions[i1], self.positions[i2]
+            if t1 > t0:
+                acceleration = ((p2 - p1) / dt - (p1 - p0) / (t1 - t0)) / (0.5 * (t2 - t0)) - self.gravity
+        self.measure[3:6] = rotateInverse(q2, acceleration)
+        return True
+
+    def samples(self, t0, t1):
+        """Returns the samples of the output clock in ]t0, t1] interpolated between the
+           previous and the current measures
+        """
+        if self.nextSample <= t0:
+            self.nextSample = (numpy.floor(t0 / self.period + 1e-9) + 1.) * self.period
+        times = numpy.arange(self.nextSample, t1 + 1e-12, self.period)
+        self.nextSample += len(times) * self.period
+        ratios = ((times - t0) / (t1 - t0))[:, None] if t1 > t0 else numpy.ones((len(times), 1))
+
+        measures = self.previous + ratios * (self.measure - self.previous)
+        orientations = self.previousOrientation + ratios * (self.orientation - self.previousOrientation)
+        orientations /= numpy.linalg.norm(orientations, axis=1)[:, None]
+        measures += self.bias
+        if numpy.any(self.noise):
+            measures += self.rng.standard_normal(measures.shape) * self.noise
+        return times, orientations, measures[:, 0:3], measures[:, 3:6]
+
+    def onAnimateEndEvent(self, event):
+        t0 = self.time
+        self.time += event['dt']
+        pose = self.robot.Chassis.Sensors.position.position.value[self.index]
+        self.push(self.time, pose)
+
+        self.previous[:] = self.measure
+        self.previousOrientation[:] = self.orientation
+        if self.orientation @ pose[3:7] < 0.:
+            self.orientation[:] = -pose[3:7]
+        else:
+            self.orientation[:] = pose[3:7]
+        if not self.update():
+            return
+        if self.count == 2:
+            self.previous[:] = self.measure
+        self.robot.angular_velocity.value = self.measure[0:3]
+        self.robot.linear_acceleration.value = self.measure[3:6]
+
+        if self.period is not None and self.output is not None:
+            times, orientations, angular, linear = self.samples(t0, self.time)
+            if len(times) == 0:
+                return
+            if self.stamp is not None:
+                stamp = self.stamp.value
+                times = numpy.maximum(0., times + (float(stamp[0]) + float(stamp[1]) * 1e-9 - self.time))
+            self.output(times, orientations, angular, linear)
+
+
+class ImuStream(object):
+    """Output function of an ImuModel publishing every sample as an Imu message
+       from a thread of its own.
+
+    The vectors and the orientation are converted from the frame of the simulation
+    (Y up, Z forward) to the ROS one (Z up, X forward) like the odometry (see
+    summitxl_roscontroller.OdomSender). The stamps are the times of the samples.
+
+    Args:
+        rosNode: the node creating the publisher (see summitxl_transport)
+        topic (str): topic of the samples
+        frame (str): frame_id of the messages
+        qos (int): depth of the publisher queue
+    """
+    axes = [2, 0, 1]
+
+    def __init__(self, rosNode, topic="/sofa_sim/imu/data", frame="imu_link", qos=10):
+        self.pub = rosNode.create_publisher(Imu, topic, qos)
+        self.msg = Imu()
+        self.msg.header.frame_id = frame
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.run, name="ImuStream", daemon=True)
+        self.thread.start()
+
+    def __call__(self, times, orientations, angular, linear):
+        axes = self.axes
+        self.queue.put((times, orientations[:, axes + [3]], angular[:, axes], linear[:, axes]))
+
+    def run(self):
+        msg = self.msg
+        stamp, o, w, a = msg.header.stamp, msg.orientation, msg.angular_velocity, msg.linear_acceleration
+        while True:
+            batch = self.queue.get()
+            if batch is None:
+                return
+            for t, orientation, angular, linear in zip(*(column.tolist() for column in batch)):
+                stamp.sec = int(t)
+                stamp.nanosec = int((t - stamp.sec) * 1e9)
+                o.x, o.y, o.z, o.w = orientation
+                w.x, w.y, w.z = angular
+                a.x, a.y, a.z = linear
+                self.pub.publish(msg)
+
+    def stop(self):
+        """Publishes the queued samples and stops the thread"""
+        self.queue.put(None)
+        self.thread.join()
@@ -0,0 +1,168 @@
+"""Skid steer kinematics of the SummitXL working in place on the
+   Rigid3d pose [x, y, z, qx, qy, qz, qw] and on the wheel angles buffers.
+
+   The robot moves in the XZ plane: it goes forward along its local Z axis
+   and turns around the Y axis. Its wheels turn around their X axis.
+
+   When the chassis moves forward by fwd and turns by angle, the contact point
+   of a wheel at the lateral position x moves forward by fwd - angle * x, so
+   without slipping the wheel turns by:
+
+        dtheta = (fwd - angle * x) / radius
+
+   which is the product of the wheel Jacobian J = [1/radius, -x/radius] with
+   [fwd, angle]. The Jacobian of all the wheels is computed once.
+"""
+import numpy
+from math import sin, cos
+
+# Radius of the wheels (meshes/wheel.stl)
+wheelRadius = 0.1175
+
+
+class SkidSteerWheels(object):
+    """The wheel Jacobian of a skid steer robot.
+
+    Args:
+        wheelPositions: positions of the wheels on the chassis
+        radius (float): radius of the wheels
+        count (int): number of entries of the wheel angles buffer, the extra entries
+                     (the root of the articulated chain) do not move
+    """
+    def __init__(self, wheelPositions, radius=wheelRadius, count=None):
+        count = count if count is not None else len(wheelPositions)
+        self.radius = radius
+        self.jacobian = numpy.zeros((count, 2))
+        for i, position in enumerate(wheelPositions):
+            self.jacobian[i] = [1. / radius, -position[0] / radius]
+        self.command = numpy.zeros(2)
+        self.delta = numpy.zeros(count)
+        self.column = self.delta.reshape(-1, 1)
+
+    @staticmethod
+    def fromChassis(chassis, radius=wheelRadius):
+        """Returns the wheels of a Chassis() from the positions of its articulation centers"""
+        positions = []
+        for motor in chassis.WheelsMotors.children:
+            for obj in motor.objects:
+                if obj.getClassName() == "ArticulationCenter":
+                    positions.append(list(obj.posOnParent.value))
+        return SkidSteerWheels(positions, radius, len(chassis.WheelsMotors.angles.position.value))
+
+    def update(self, angles, fwd, angle):
+        """Turns the wheel angles (Vec1d) in place for a forward displacement and a rotation"""
+        self.command[0] = fwd
+        self.command[1] = angle
+        numpy.dot(self.jacobian, self.command, out=self.delta)
+        angles += self.column if angles.ndim == 2 else self.delta
+
+
+def move(pose, angles, fwd, angle, wheels):
+    """Moves one robot by fwd along its forward direction and rotates it by angle
+       around Y, then makes its wheels turn accordingly.
+
+    Args:
+        pose: the chassis Rigid3d pose, updated in place
+        angles: the WheelsMotors angles (Vec1d), updated in place
+        fwd (float): forward displacement
+        angle (float): rotation around Y in radians
+        wheels (SkidSteerWheels): the wheel Jacobian
+    """
+    qx, qy, qz, qw = pose[3], pose[4], pose[5], pose[6]
+
+    # forward = orientation applied to [0, 0, 1]
+    pose[0] += fwd * 2. * (qx * qz + qw * qy)
+    pose[1] += fwd * 2. * (qy * qz - qw * qx)
+    pose[2] += fwd * (1. - 2. * (qx * qx + qy * qy))
+
+    # orientation = orientation * rotation(Y, angle)
+    s, c = sin(angle * 0.5), cos(angle * 0.5)
+    pose[3] = qx * c - qz * s
+    pose[4] = qw * s + qy * c
+    pose[5] = qx * s + qz * c
+    pose[6] = qw * c - qy * s
+
+    wheels.update(angles, fwd, angle)
+
+
+class FleetKinematics(object):
+    """Batched version of move() advancing K independent robots in one call.
+
+    The scratch arrays are allocated once so that step() does not create
+    temporary arrays.
+
+    Args:
+        count (int): number of robots K
+        wheels (SkidSteerWheels): the wheel Jacobian, shared by the robots
+    """
+    def __init__(self, count, wheels):
+        self.jacobianT = numpy.ascontiguousarray(wheels.jacobian.T)
+        self.s = numpy.empty(count)
+        self.c = numpy.empty(count)
+        self.a = numpy.empty(count)
+        self.b = numpy.empty(count)
+        self.q = numpy.empty((count, 4))
+        self.command = numpy.empty((count, 2))
+        self.wheels = numpy.empty((count, len(wheels.jacobian)))
+
+    def step(self, poses, angles, fwd, angle):
+        """Moves the K robots.
+
+        Args:
+            poses: (K, 7) array of chassis poses, updated in place
+            angles: (K, wheelcount) array of wheel angles, updated in place
+            fwd: (K,) array of forward displacements
+            angle: (K,) array of rotations around Y
+        """
+        a, b, q = self.a, self.b, self.q
+        qx, qy, qz, qw = poses[:, 3], poses[:, 4], poses[:, 5], poses[:, 6]
+
+        # forward = orientation applied to [0, 0, 1]
+        numpy.multiply(qx, qz, out=a)
+        numpy.multiply(qw, qy, out=b)
+        a += b
+        a *= fwd
+        a *= 2.
+        poses[:, 0] += a
+
+        numpy.multiply(qy, qz, out=a)
+        numpy.multiply(qw, qx, out=b)
+        a -= b
+        a *= fwd
+        a *= 2.
+        poses[:, 1] += a
+
+        numpy.multiply(qx, qx, out=a)
+        numpy.multiply(qy, qy, out=b)
+        a += b
+        a *= -2.
+        a += 1.
+        a *= fwd
+        poses[:, 2] += a
+
+        # orientation = orientation * rotation(Y, angle)
+        numpy.multiply(angle, 0.5, out=a)
+        numpy.sin(a, out=self.s)
+        numpy.cos(a, out=self.c)
+        s, c = self.s, self.c
+        q[:] = poses[:, 3:7]
+        qx, qy, qz, qw = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+
+        numpy.multiply(qx, c, out=a)
+        numpy.multiply(qz, s, out=b)
+        numpy.subtract(a, b, out=poses[:, 3])
+        numpy.multiply(qw, s, out=a)
+        numpy.multiply(qy, c, out=b)
+        numpy.add(a, b, out=poses[:, 4])
+        numpy.multiply(qx, s, out=a)
+        numpy.multiply(qz, c, out=b)
+        numpy.add(a, b, out=poses[:, 5])
+        numpy.multiply(qw, c, out=a)
+        numpy.multiply(qy, s, out=b)
+        numpy.subtract(a, b, out=poses[:, 6])
+
+        # wheels: one (K, 2) x (2, n) product
+        self.command[:, 0] = fwd
+        self.command[:, 1] = angle
+        numpy.matmul(self.command, self.jacobianT, out=self.wheels)
+        angles += self.wheels
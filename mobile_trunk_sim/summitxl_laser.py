@@ -0,0 +1,150 @@
+"""Simulated 2D laser scanner on the 'lazer' frame of the SummitXL.
+
+The scan is cast in the horizontal plane of the sensor against the static
+triangles of the given obstacle nodes (e.g. the Floor), gathered once in a
+summitxl_bvh.TriangleBVH at the first step. The LaserScanner is the sending
+function of a RateLimitedSender: the simulation thread only copies the sensor
+poses when a scan is due and the rays are cast by the BackgroundPublisher
+thread, so the scan does not slow the simulation down.
+
+    Laser(robot, transport, obstacles=[floor], rate=10., publisher=publisher)
+
+The scan being level, a horizontal floor below the sensor is never hit: the
+scans only have returns where the scene holds geometry at the height of the
+laser (walls, summit_xl.Obstacles, ...).
+
+The angles follow the LaserScan convention: 0 is the forward direction of the
+robot (local Z) and positive angles turn to the left around the up axis (Y).
+"""
+import array
+import numpy
+import Sofa
+from sensor_msgs.msg import LaserScan
+from summitxl_bvh import TriangleBVH
+
+# Index of the lazer frame in Sensors.position (the first entry is the root of the chain)
+lazerIndex = 1
+
+
+def descendants(nodes):
+    for node in nodes:
+        yield node
+        yield from descendants(node.children)
+
+
+def staticTriangles(nodes):
+    """Returns the merged (positions, triangles) of the topologies of the nodes and
+       of their children, the quads being split in two triangles
+    """
+    positions, triangles, offset = [], [], 0
+    for node in descendants(nodes):
+        for obj in node.objects:
+            if not obj.getClassName().endswith("Topology") or obj.findData("triangles") is None:
+                continue
+            p = numpy.array(obj.position.value, dtype=numpy.float64).reshape(-1, 3)
+            t = numpy.array(obj.triangles.value, dtype=numpy.int64).reshape(-1, 3)
+            q = numpy.array(obj.quads.value, dtype=numpy.int64).reshape(-1, 4) if obj.findData("quads") else \
+                numpy.empty((0, 4), dtype=numpy.int64)
+            t = numpy.concatenate([t, q[:, [0, 1, 2]], q[:, [0, 2, 3]]])
+            positions.append(p)
+            triangles.append(t + offset)
+            offset += len(p)
+            break
+    if not positions:
+        return numpy.empty((0, 3)), numpy.empty((0, 3), dtype=numpy.int64)
+    return numpy.concatenate(positions), numpy.concatenate(triangles)
+
+
+def rotate(q, v):
+    """Rotates the (k, 3) vectors v by the quaternion q = [x, y, z, w]"""
+    u, w = numpy.asarray(q[:3]), q[3]
+    t = 2. * numpy.cross(u, v)
+    return v + w * t + numpy.cross(u, t)
+
+
+class LaserScanner(object):
+    """Sending function building a LaserScan from the sensor poses and the timestamp.
+
+    Args:
+        angleMin (float): angle of the first ray in radians
+        angleMax (float): angle of the last ray in radians
+        count (int): number of rays
+        rangeMin (float): distances below it are reported as no return
+        rangeMax (float): maximum distance of the scan
+        rate (float): scans per second, written in scan_time
+        frame (str): frame_id of the messages
+    """
+    def __init__(self, angleMin=-2.0944, angleMax=2.0944, count=683, rangeMin=0.02, rangeMax=5.6, rate=10.,
+                 frame="lazer"):
+        self.bvh = None
+        self.angles = numpy.linspace(angleMin, angleMax, count)
+        self.local = numpy.stack([numpy.sin(self.angles), numpy.zeros(count), numpy.cos(self.angles)], axis=1)
+        self.rangeMin = rangeMin
+        self.rangeMax = rangeMax
+        self.distances = numpy.empty(count)
+
+        self.msg = LaserScan()
+        self.msg.header.frame_id = frame
+        self.msg.angle_min = float(angleMin)
+        self.msg.angle_max = float(angleMax)
+        self.msg.angle_increment = float((angleMax - angleMin) / max(1, count - 1))
+        self.msg.scan_time = 1. / rate if rate else 0.
+        self.msg.range_min = float(rangeMin)
+        self.msg.range_max = float(rangeMax)
+
+    def scan(self, pose):
+        """Returns the distances measured from the Rigid3d pose of the sensor"""
+        if self.bvh is None:
+            self.distances.fill(numpy.inf)
+            return self.distances
+        directions = rotate(pose[3:7], self.local)
+        self.bvh.raycast(pose[0:3], directions, self.rangeMax, out=self.distances)
+        # no return below the minimum range or up to the maximum one
+        self.distances[(self.distances < self.rangeMin) | (self.distances >= self.rangeMax)] = numpy.inf
+        return self.distances
+
+    def __call__(self, data):
+        msg = self.msg
+        distances = self.scan(numpy.asarray(data[0].value)[lazerIndex])
+        msg.ranges = array.array('f', distances.astype(numpy.float32).tobytes())
+        stamp = data[1].value
+        msg.header.stamp.sec = int(stamp[0])
+        msg.header.stamp.nanosec = int(stamp[1])
+        return msg
+
+
+class LaserGeometry(Sofa.Core.Controller):
+    """Builds the BVH of the scanner from the obstacles at the first step, once
+       their loaders are initialized.
+
+    Args:
+        scanner (LaserScanner): the scanner using the BVH
+        obstacles (list): nodes holding the static topologies hit by the rays
+    """
+    def __init__(self, *args, **kwargs):
+        self.scanner = kwargs.pop("scanner")
+        self.obstacles = kwargs.pop("obstacles")
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+
+    def onAnimateBeginEvent(self, event):
+        if self.scanner.bvh is None:
+            self.scanner.bvh = TriangleBVH(*staticTriangles(self.obstacles))
+
+
+def Laser(robot, transport, obstacles, rate=10., topic="/sofa_sim/scan", publisher=None, **scanArgs):
+    """Adds a 2D laser scanner publishing LaserScan messages on the lazer frame of a SummitXL.
+
+    Args:
+        robot: the SummitXL node
+        transport: where the scans are published (see summitxl_transport)
+        obstacles (list): nodes holding the static topologies hit by the rays
+        rate (float): scans per second of simulated time
+        topic (str): topic of the scans
+        publisher (BackgroundPublisher): thread casting the rays and publishing the scans
+        scanArgs: arguments of the LaserScanner (angleMin, angleMax, count, rangeMin, rangeMax)
+    """
+    scanner = LaserScanner(rate=rate, **scanArgs)
+    robot.addObject(LaserGeometry(name="LaserGeometry", scanner=scanner, obstacles=obstacles))
+    robot.addObject(transport.sender(topic, [robot.Chassis.Sensors.position.position, robot.findData("timestamp")],
+                                     LaserScan, scanner, rate=rate, publisher=publisher))
+    return scanner
@@ -0,0 +1,168 @@
+"""Latency instrumentation of the real robot odometry tracked by SummitxlROSController.
+
+For each odometry message, a LatencyTracker records:
+    - stamp: the header stamp of the message (clock of the sender)
+    - received: wall clock time when odom_recv got it
+    - consumed: wall clock time when the controller used it at the beginning of a step
+    - simtime: simulation time of that step
+    - published: wall clock time when the first sim odometry copied after that step
+                 is published
+
+From which the following latencies are computed (in seconds):
+    - transport: received - stamp
+    - queue: consumed - received, how stale reel_position is when it is used
+    - publish: published - consumed
+    - total: published - stamp
+
+    tracker = LatencyTracker()
+    odomrecv = trackedRecv(tracker, odom_recv)
+    odomsend = trackedSender(tracker, OdomSender())
+    SummitxlROSController(name="KeyboardController", robot=robot, latency=tracker)
+    ...
+    tracker.export("latency")
+"""
+import json
+import time
+import numpy
+
+columns = ["stamp", "received", "consumed", "simtime", "published"]
+latencies = {"transport": ("received", "stamp"),
+             "queue": ("consumed", "received"),
+             "publish": ("published", "consumed"),
+             "total": ("published", "stamp")}
+
+
+class LatencyTracker(object):
+    """Ring buffer of the timings of the last 'capacity' odometry messages.
+
+    Args:
+        capacity (int): number of messages kept
+        clock: function returning the wall clock time in seconds, it must use the same
+               time base as the message stamps
+    """
+    def __init__(self, capacity=100000, clock=time.time):
+        self.capacity = capacity
+        self.clock = clock
+        self.records = {name: numpy.full(capacity, numpy.nan) for name in columns}
+        self.count = 0
+        self.pending = -1
+        self.unpublished = -1
+
+    def received(self, sec, nanosec):
+        """Called when an odometry message is received"""
+        i = self.count % self.capacity
+        for name in columns:
+            self.records[name][i] = numpy.nan
+        self.records["stamp"][i] = sec + nanosec * 1e-9
+        self.records["received"][i] = self.clock()
+        self.count += 1
+        self.pending = i
+
+    def consumed(self, simtime):
+        """Called by the controller when a step uses the last received message"""
+        if self.pending < 0:
+            return
+        self.records["consumed"][self.pending] = self.clock()
+        self.records["simtime"][self.pending] = simtime
+        self.unpublished, self.pending = self.pending, -1
+
+    def take(self):
+        """Called in the simulation thread when the sim odometry is copied, returns the
+           message consumed since the previous copy (None when there is none)
+        """
+        if self.unpublished < 0:
+            return None
+        i, self.unpublished = self.unpublished, -1
+        return i
+
+    def published(self, i):
+        """Called when the sim odometry copied with the message i (see take) is published"""
+        if i is None:
+            return
+        self.records["published"][i] = self.clock()
+
+    def latency(self, name):
+        """Returns the measured values of a latency (see the module documentation)"""
+        end, begin = latencies[name]
+        n = min(self.count, self.capacity)
+        values = self.records[end][:n] - self.records[begin][:n]
+        return values[~numpy.isnan(values)]
+
+    def percentiles(self, name, q=(50, 99)):
+        values = self.latency(name)
+        if len(values) == 0:
+            return [numpy.nan for _ in q]
+        return numpy.percentile(values, q).tolist()
+
+    def histogram(self, name, bins=50):
+        """Returns the (counts, edges) histogram of a latency"""
+        values = self.latency(name)
+        if len(values) == 0:
+            return numpy.zeros(bins, dtype=int), numpy.zeros(bins + 1)
+        return numpy.histogram(values, bins=bins)
+
+    def summary(self):
+        """Returns count, p50, p99 and max of each latency"""
+        result = {}
+        for name in latencies:
+            values = self.latency(name)
+            p50, p99 = self.percentiles(name)
+            result[name] = {"count": int(len(values)), "p50": p50, "p99": p99,
+                            "max": float(values.max()) if len(values) else numpy.nan}
+        return result
+
+    def export(self, prefix, bins=50):
+        """Writes the raw records in prefix.npz and the summary with the histograms in prefix.json"""
+        n = min(self.count, self.capacity)
+        order = numpy.roll(numpy.arange(n), -(self.count % self.capacity)) if self.count > self.capacity else numpy.arange(n)
+        numpy.savez(prefix + ".npz", **{name: self.records[name][order] for name in columns})
+
+        summary = self.summary()
+        for name in latencies:
+            counts, edges = self.histogram(name, bins)
+            summary[name]["histogram"] = {"counts": counts.tolist(), "edges": edges.tolist()}
+        with open(prefix + ".json", "w") as f:
+            json.dump(summary, f, indent=2)
+
+    def report(self):
+        """Returns a printable summary"""
+        lines = ["{0:<10}{1:>8}{2:>12}{3:>12}{4:>12}".format("latency", "count", "p50 (ms)", "p99 (ms)", "max (ms)")]
+        for name, s in self.summary().items():
+            lines.append("{0:<10}{1:>8}{2:>12.3f}{3:>12.3f}{4:>12.3f}".format(name, s["count"], s["p50"] * 1e3,
+                                                                          s["p99"] * 1e3, s["max"] * 1e3))
+        return "\n".join(lines)
+
+
+def trackedRecv(tracker, recv):
+    """Returns a receiving function calling recv and recording the reception of the message"""
+    def fn(data, datafield):
+        tracker.received(data.header.stamp.sec, data.header.stamp.nanosec)
+        recv(data, datafield)
+    return fn
+
+
+class TrackedSender(object):
+    """Sending function of a RateLimitedSender calling sendingFn and recording the
+       publication of the message.
+
+    The consumed message is taken when the Data fields are copied (capture) and
+    carried with the copy, so that the publishing thread credits the publication
+    to the message of the step that was copied.
+    """
+    def __init__(self, tracker, sendingFn):
+        self.tracker = tracker
+        self.sendingFn = sendingFn
+
+    def __call__(self, data):
+        return self.sendingFn(data)
+
+    def capture(self):
+        return self.tracker.take()
+
+    def published(self, i):
+        self.tracker.published(i)
+
+
+def trackedSender(tracker, sendingFn):
+    """Returns a sending function calling sendingFn and recording the publication of the message"""
+    return TrackedSender(tracker, sendingFn)
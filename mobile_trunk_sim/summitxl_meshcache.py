@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Binary cache of the STL/OBJ meshes used by the SummitXL scenes.
+
+The meshes are parsed once, transformed like a SOFA MeshLoader would do it
+(scale, then rotation, then translation) and their duplicated vertices are
+merged. The resulting position and triangle arrays are stored as .npy files
+that are memory mapped when loaded. The simplified levels of detail of the
+meshes (see summitxl_meshlod) are stored the same way.
+
+A cache entry is keyed by the hash of the mesh file and the transform, so
+editing the mesh or changing the transform makes a new entry and removes the
+stale one.
+
+To fill the cache before running the scenes:
+    python3 summitxl_meshcache.py
+"""
+import os
+import hashlib
+import numpy
+import summitxl_meshlod
+from math import pi, sin, cos
+
+# Set to False to load the meshes with the SOFA loaders.
+useCache = True
+
+basedir = os.path.dirname(os.path.abspath(__file__))
+cachedir = os.path.join(basedir, "meshes", ".cache")
+
+
+def findFile(filepath):
+    """Returns the path of a mesh given relatively to the working directory or to this file"""
+    if os.path.isabs(filepath) or os.path.exists(filepath):
+        return filepath
+    return os.path.join(basedir, filepath)
+
+
+def readSTL(filename):
+    """Returns the corners of the triangles of a binary or ascii STL file as a (n*3, 3) array"""
+    with open(filename, "rb") as f:
+        content = f.read()
+    if len(content) >= 84:
+        count = int(numpy.frombuffer(content, dtype="<u4", count=1, offset=80)[0])
+        if len(content) == 84 + 50 * count:
+            records = numpy.frombuffer(content, dtype=numpy.dtype([("normal", "<f4", 3), ("corners", "<f4", (3, 3)),
+                                                                   ("attribute", "<u2")]), count=count, offset=84)
+            return records["corners"].reshape(-1, 3).astype(numpy.float64)
+    corners = [line.split()[1:4] for line in content.decode("ascii", "replace").splitlines()
+               if line.strip().startswith("vertex")]
+    return numpy.array(corners, dtype=numpy.float64).reshape(-1, 3)
+
+
+def readOBJ(filename):
+    """Returns the vertices and the triangles of an OBJ file, the polygons are split in triangles"""
+    vertices, triangles = [], []
+    with open(filename) as f:
+        for line in f:
+            values = line.split()
+            if not values:
+                continue
+            if values[0] == "v":
+                vertices.append([float(v) for v in values[1:4]])
+            elif values[0] == "f":
+                face = [int(v.split("/")[0]) for v in values[1:]]
+                face = [i - 1 if i > 0 else len(vertices) + i for i in face]
+                for i in range(1, len(face) - 1):
+                    triangles.append([face[0], face[i], face[i + 1]])
+    return numpy.array(vertices, dtype=numpy.float64).reshape(-1, 3), numpy.array(triangles, dtype=numpy.int32).reshape(-1, 3)
+
+
+def rotationMatrix(rotation):
+    """Returns the rotation matrix of the euler angles (in degrees) used by the SOFA loaders"""
+    a0, a1, a2 = [r * pi / 360. for r in rotation]
+    w = cos(a0) * cos(a1) * cos(a2) + sin(a0) * sin(a1) * sin(a2)
+    x = sin(a0) * cos(a1) * cos(a2) - cos(a0) * sin(a1) * sin(a2)
+    y = cos(a0) * sin(a1) * cos(a2) + sin(a0) * cos(a1) * sin(a2)
+    z = cos(a0) * cos(a1) * sin(a2) - sin(a0) * sin(a1) * cos(a2)
+    return numpy.array([[1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+                        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+                        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)]])
+
+
+def buildMesh(filename, rotation=[0, 0, 0], translation=[0, 0, 0], scale=1):
+    """Parses and transforms a mesh file.
+
+    Returns:
+        (positions, triangles): a (n, 3) float array and a (m, 3) int32 array
+    """
+    if filename.lower().endswith(".obj"):
+        positions, triangles = readOBJ(filename)
+    else:
+        corners = readSTL(filename)
+        positions, inverse = numpy.unique(corners, axis=0, return_inverse=True)
+        triangles = inverse.reshape(-1, 3).astype(numpy.int32)
+
+    positions = positions * numpy.array(scale, dtype=numpy.float64)
+    positions = positions @ rotationMatrix(rotation).T + numpy.array(translation, dtype=numpy.float64)
+    return positions, triangles
+
+
+def cacheKey(filename, rotation, translation, scale):
+    """Returns the key of a mesh file with a given transform"""
+    h = hashlib.sha1()
+    with open(filename, "rb") as f:
+        h.update(f.read())
+    h.update(repr((list(rotation), list(translation), scale)).encode())
+    return h.hexdigest()
+
+
+def saveArray(filename, array):
+    """Writes a .npy file through a temporary file, so that the processes memory mapping
+       the cache never see a partially written array
+    """
+    temporary = "{0}.{1}.tmp".format(filename, os.getpid())
+    with open(temporary, "wb") as f:
+        numpy.save(f, array)
+    os.replace(temporary, filename)
+
+
+def loadMesh(filepath, rotation=[0, 0, 0], translation=[0, 0, 0], scale=1, lod="full"):
+    """Returns the transformed positions and triangles of a mesh from the cache,
+       the cache entry is built when missing.
+
+       lod is the level of detail of the mesh (see summitxl_meshlod).
+    """
+    filename = findFile(filepath)
+    prefix = os.path.basename(filename) + "-" + lod + "-"
+    key = cacheKey(filename, rotation, translation, scale)
+    positionsfile = os.path.join(cachedir, prefix + key + ".positions.npy")
+    trianglesfile = os.path.join(cachedir, prefix + key + ".triangles.npy")
+
+    if os.path.exists(positionsfile) and os.path.exists(trianglesfile):
+        return numpy.load(positionsfile, mmap_mode="r"), numpy.load(trianglesfile, mmap_mode="r")
+
+    positions, triangles = buildMesh(filename, rotation, translation, scale)
+    positions, triangles = summitxl_meshlod.simplify(positions, triangles, lod)
+    try:
+        os.makedirs(cachedir, exist_ok=True)
+        for entry in os.listdir(cachedir):
+            if entry.startswith(prefix) and not entry.startswith(prefix + key) and not entry.endswith(".tmp"):
+                try:
+                    os.remove(os.path.join(cachedir, entry))
+                except FileNotFoundError:
+                    # already removed by another process
+                    pass
+        saveArray(positionsfile, positions)
+        saveArray(trianglesfile, triangles)
+    except OSError as e:
+        print("Unable to cache the mesh {0}: {1}".format(filepath, e))
+    return positions, triangles
+
+
+def addMesh(node, filepath, name="loader", rotation=[0, 0, 0], translation=[0, 0, 0], scale=1, lod="full"):
+    """Adds to the node an object named 'name' providing the 'position' and 'triangles'
+       of a transformed mesh, it can be used as the src of a topology or an OglModel.
+
+       When useCache is True this is a MeshTopology filled from the cache, otherwise
+       it is a MeshSTLLoader or a MeshObjLoader. The simplified levels of detail are
+       always read from the cache.
+    """
+    if not useCache and lod == "full":
+        loader = 'MeshObjLoader' if filepath.lower().endswith(".obj") else 'MeshSTLLoader'
+        return node.addObject(loader, name=name, filename=filepath, rotation=rotation,
+                              translation=translation, scale=scale)
+
+    positions, triangles = loadMesh(filepath, rotation, translation, scale, lod)
+    mesh = node.addObject('MeshTopology', name=name)
+    mesh.position.value = positions
+    mesh.triangles.value = triangles
+    return mesh
+
+
+def main():
+    import summit_xl
+    meshes = [(filepath, summit_xl.chassisRotation) for filepath, _ in summit_xl.chassisParts.values()]
+    meshes += [(filepath, summit_xl.sensorRotation) for filepath, _ in summit_xl.sensorParts.values()]
+    meshes.append((summit_xl.wheelMesh, summit_xl.wheelRotation))
+    for filepath, rotation in meshes:
+        for lod in summitxl_meshlod.lods[:-1]:
+            positions, triangles = loadMesh(filepath, rotation, lod=lod)
+            print("{0} ({1}): {2} vertices, {3} triangles".format(filepath, lod, len(positions), len(triangles)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Level of detail of the SummitXL visual meshes.
+
+   - "full": the original mesh
+   - "simplified": the mesh decimated by vertex clustering
+   - "bbox": the axis aligned bounding box of the mesh
+   - "none": no visual model at all
+
+The simplified and bbox meshes are computed offline with the mesh cache
+(see summitxl_meshcache).
+"""
+import numpy
+
+lods = ["full", "simplified", "bbox", "none"]
+
+# Number of clustering cells along the largest side of a simplified mesh
+resolution = 16
+
+boxTriangles = numpy.array([[0, 1, 2], [1, 3, 2], [4, 6, 5], [5, 6, 7],
+                            [0, 4, 1], [1, 4, 5], [2, 3, 6], [3, 7, 6],
+                            [0, 2, 4], [2, 6, 4], [1, 5, 3], [3, 5, 7]], dtype=numpy.int32)
+
+
+def checkLod(lod):
+    if lod not in lods:
+        raise ValueError("Unknown level of detail '{0}', expected one of: {1}".format(lod, ", ".join(lods)))
+
+
+def decimate(positions, triangles, resolution=resolution):
+    """Simplifies a mesh by merging the vertices falling in the same cell of a regular grid.
+
+    Returns:
+        (positions, triangles) of the simplified mesh
+    """
+    positions = numpy.asarray(positions)
+    lower, upper = positions.min(axis=0), positions.max(axis=0)
+    cellsize = max(float((upper - lower).max()) / resolution, 1e-12)
+    cells = numpy.floor((positions - lower) / cellsize).astype(numpy.int64)
+    _, cluster, counts = numpy.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    cluster = cluster.reshape(-1)
+
+    newpositions = numpy.zeros((len(counts), 3))
+    numpy.add.at(newpositions, cluster, positions)
+    newpositions /= counts[:, None]
+
+    newtriangles = cluster[numpy.asarray(triangles)]
+    valid = ((newtriangles[:, 0] != newtriangles[:, 1]) & (newtriangles[:, 1] != newtriangles[:, 2])
+             & (newtriangles[:, 2] != newtriangles[:, 0]))
+    newtriangles = numpy.unique(newtriangles[valid], axis=0)
+    return newpositions, newtriangles.astype(numpy.int32)
+
+
+def boundingBox(positions):
+    """Returns the positions and triangles of the bounding box of a mesh"""
+    positions = numpy.asarray(positions)
+    lower, upper = positions.min(axis=0), positions.max(axis=0)
+    corners = numpy.array([[(upper if i & 4 else lower)[0], (upper if i & 2 else lower)[1],
+                            (upper if i & 1 else lower)[2]] for i in range(8)])
+    return corners, boxTriangles.copy()
+
+
+def simplify(positions, triangles, lod):
+    """Returns the mesh at the given level of detail"""
+    checkLod(lod)
+    if lod == "simplified":
+        return decimate(positions, triangles)
+    if lod == "bbox":
+        return boundingBox(positions)
+    return positions, triangles
@@ -0,0 +1,105 @@
+import sys
+import numpy
+
+
+class PrintSink(object):
+    """Prints the full chassis pose at every step (the historical behavior of
+       the SummitxlController)
+    """
+    def write(self, time, pose):
+        print("position x = ", pose[0])
+        print("position y = ", pose[1])
+        print("position z = ", pose[2])
+        print("\n")
+        print("orientation x = ", pose[3])
+        print("orientation y = ", pose[4])
+        print("orientation z = ", pose[5])
+        print("orientation w = ", pose[6])
+
+    def close(self):
+        pass
+
+
+class NullSink(object):
+    """Discards the chassis pose, use it for batch runs"""
+    def write(self, time, pose):
+        pass
+
+    def close(self):
+        pass
+
+
+class DecimatedSink(object):
+    """Prints the chassis pose on a single line every 'every' steps
+
+    Args:
+        every (int): number of steps between two printed poses
+        stream : file-like object to write to (default: stdout)
+    """
+    def __init__(self, every=100, stream=None):
+        self.every = max(1, int(every))
+        self.stream = stream if stream is not None else sys.stdout
+        self.count = 0
+
+    def write(self, time, pose):
+        if self.count % self.every == 0:
+            self.stream.write("t={0:.4f} pose={1}\n".format(time, " ".join("{0:.6f}".format(v) for v in pose)))
+        self.count += 1
+
+    def close(self):
+        self.stream.flush()
+
+
+class TrajectoryFileSink(object):
+    """Stores the chassis pose in a binary trajectory file.
+
+    The file is a flat sequence of float64 records [time, x, y, z, qx, qy, qz, qw]
+    that can be read back with loadTrajectory(). The records are accumulated in a
+    preallocated buffer and written to disk when the buffer is full.
+
+    Args:
+        filename (str): path of the trajectory file
+        buffersize (int): number of records kept in memory before flushing
+    """
+    recordsize = 8
+
+    def __init__(self, filename, buffersize=4096):
+        self.file = open(filename, "wb")
+        self.buffer = numpy.empty((max(1, int(buffersize)), self.recordsize), dtype=numpy.float64)
+        self.count = 0
+
+    def write(self, time, pose):
+        record = self.buffer[self.count]
+        record[0] = time
+        record[1:] = pose
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        self.buffer[:self.count].tofile(self.file)
+        self.count = 0
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+def loadTrajectory(filename):
+    """Returns the records of a trajectory file as a (n, 8) array"""
+    return numpy.fromfile(filename, dtype=numpy.float64).reshape(-1, TrajectoryFileSink.recordsize)
+
+
+def createSink(kind, every=100, filename="trajectory.bin"):
+    """Returns a pose sink from its name: 'print', 'off', 'decimated' or 'file'"""
+    if kind == "print":
+        return PrintSink()
+    if kind == "off":
+        return NullSink()
+    if kind == "decimated":
+        return DecimatedSink(every=every)
+    if kind == "file":
+        return TrajectoryFileSink(filename)
+    raise ValueError("Unknown pose sink '{0}', expected one of: print, off, decimated, file".format(kind))
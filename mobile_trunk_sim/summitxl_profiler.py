@@ -0,0 +1,137 @@
+"""Opt-in profiling of the steps of a SummitXL scene.
+
+The SummitXLProfiler times the animate begin/end callbacks of the python
+controllers of a robot (SummitxlController, SummitxlROSController, ...) and
+reads the SOFA AdvancedTimer records of each step to get the time spent in
+the mappings (the ArticulatedSystemMappings of the wheels and the sensors,
+the RigidMappings of the visual models) and in the rest of the step.
+
+The timings of the last 'window' steps are kept and written at exit as a
+folded stacks file ("frame;frame;frame microseconds" per line) that can be
+turned into a flame graph with flamegraph.pl or speedscope.
+
+    robot.addObject(SummitXLProfiler(name="Profiler", robot=robot, output="summitxl.folded"))
+"""
+import atexit
+import time
+from collections import deque, defaultdict
+import Sofa
+import Sofa.Timer
+
+timerName = "Animate"
+callbacks = ["onAnimateBeginEvent", "onAnimateEndEvent"]
+
+
+def frames(record):
+    """Yields the (name, record) children of an AdvancedTimer record, the repeated
+       frames (given as a list of records) are yielded once per occurrence
+    """
+    for name, child in record.items():
+        if isinstance(child, dict):
+            yield name, child
+        elif isinstance(child, list):
+            for item in child:
+                if isinstance(item, dict):
+                    yield name, item
+
+
+def steps(records):
+    """Returns the records of the steps of getRecords(), which may be keyed by step number"""
+    numbered = [record for name, record in records.items() if str(name).isdigit() and isinstance(record, dict)]
+    return numbered or [records]
+
+
+class SummitXLProfiler(Sofa.Core.Controller):
+    """Profiles the steps of the scene containing the robot.
+
+    Args:
+        robot: the SummitXL node whose controllers are timed
+        window (int): number of steps kept
+        output (str): folded stacks file written at exit, nothing is written when None
+    """
+    def __init__(self, *args, **kwargs):
+        window = kwargs.pop("window", 1000)
+        output = kwargs.pop("output", "summitxl.folded")
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        self.robot = kwargs["robot"]
+        self.window = window
+        self.output = output
+        self.timings = defaultdict(lambda: deque([0.] * self.window, maxlen=self.window))
+        self.current = defaultdict(float)
+        self.steps = 0
+        self.instrumented = False
+
+        Sofa.Timer.setEnabled(timerName, True)
+        Sofa.Timer.setInterval(timerName, 1)
+        Sofa.Timer.setOutputType(timerName, "json")
+        if output is not None:
+            atexit.register(self.dump, output)
+
+    def instrument(self):
+        """Replaces the callbacks of the robot's controllers by timed ones"""
+        for obj in self.robot.objects:
+            if obj is self or not isinstance(obj, Sofa.Core.Controller):
+                continue
+            for callback in callbacks:
+                if hasattr(type(obj), callback):
+                    stack = "{0};{1};{2}".format(timerName, callback, obj.name.value)
+                    setattr(obj, callback, self.timed(stack, getattr(obj, callback)))
+        self.instrumented = True
+
+    def timed(self, stack, fn):
+        def wrapper(event):
+            start = time.perf_counter()
+            try:
+                return fn(event)
+            finally:
+                self.current[stack] += (time.perf_counter() - start) * 1e6
+        return wrapper
+
+    def init(self):
+        if not self.instrumented:
+            self.instrument()
+
+    def onAnimateBeginEvent(self, event):
+        if not self.instrumented:
+            self.instrument()
+            return
+        self.collect()
+
+    def collect(self):
+        """Moves the timings of the step that just ended into the window"""
+        try:
+            records = Sofa.Timer.getRecords(timerName)
+        except Exception:
+            records = None
+        if isinstance(records, dict):
+            # the step numbers are not part of the stacks, they would make a new stack per step
+            for record in steps(records):
+                self.walk(timerName, record)
+
+        for stack in set(self.timings) | set(self.current):
+            self.timings[stack].append(self.current.get(stack, 0.))
+        self.current.clear()
+        self.steps += 1
+
+    def walk(self, stack, record):
+        """Adds the self time (in us) of each frame of an AdvancedTimer record, returns its total time"""
+        children = 0.
+        for name, child in frames(record):
+            children += self.walk(stack + ";" + name.replace(";", ","), child)
+        total = record.get("total_time")
+        total = total * 1e3 if isinstance(total, (int, float)) else children
+        self.current[stack] += max(0., total - children)
+        return total
+
+    def summary(self):
+        """Returns the mean time in us per step of each frame over the window"""
+        n = max(1, min(self.steps, self.window))
+        return {stack: sum(values) / n for stack, values in self.timings.items()}
+
+    def dump(self, filename):
+        """Writes the timings of the window as folded stacks"""
+        with open(filename, "w") as f:
+            for stack, values in sorted(self.timings.items()):
+                total = int(round(sum(values)))
+                if total > 0:
+                    f.write("{0} {1}\n".format(stack, total))
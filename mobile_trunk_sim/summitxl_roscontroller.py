@@ -1,12 +1,11 @@
 # coding: utf8
 #!/usr/bin/env python3
 import Sofa
-from splib3.numerics import RigidDof
 from sensor_msgs.msg import Imu
-from geometry_msgs.msg import Twist,Point, Pose, Quaternion, Twist, Vector3
+from geometry_msgs.msg import Twist
 from nav_msgs.msg import Odometry
-import time
-from math import *
+import numpy
+import summitxl_kinematics
 
 def send(data):
     """This is a message to hold data from an IMU (Inertial Measurement Unit)
@@ -91,15 +90,16 @@ def odom_recv(data, datafield):
 
     sim_orientation = [ x, y, z, w] with  x = 0. and z = 0.
     reel_orientation = [x, y, z, w] with  x = 0. and y = 0.
-    => sim_orientation = [reel_orientation.x, reel_orientation.z, reel_orientation.y,
+    => sim_orientation = [reel_orientation.y, reel_orientation.z, reel_orientation.x,
                             reel_orientation.w]
+    the axes of the orientation are permuted like the ones of the position, so that
+    the odometry, the IMU and the scans share one frame convention
     """
-    datafield[0].value = [data.header.stamp.sec ,data.header.stamp.nanosec]
-    datafield[1].value = [data.pose.pose.position.y,data.pose.pose.position.z,
-                          data.pose.pose.position.x]
+    stamp, position, orientation = data.header.stamp, data.pose.pose.position, data.pose.pose.orientation
+    datafield[0].value = [stamp.sec, stamp.nanosec]
+    datafield[1].value = [position.y, position.z, position.x]
 
-    datafield[2].value = [data.pose.pose.orientation.x,data.pose.pose.orientation.z,
-                          data.pose.pose.orientation.y,data.pose.pose.orientation.w ]
+    datafield[2].value = [orientation.y, orientation.z, orientation.x, orientation.w]
 
 
 def odom_send(data):
@@ -122,9 +122,9 @@ def odom_send(data):
     msg.pose.pose.position.y = data[1].value[0]
 
     #odom orientation x y z w
-    msg.pose.pose.orientation.x = data[2].value[0]
+    msg.pose.pose.orientation.y = data[2].value[0]
     msg.pose.pose.orientation.z = data[2].value[1]
-    msg.pose.pose.orientation.y = data[2].value[2]
+    msg.pose.pose.orientation.x = data[2].value[2]
     msg.pose.pose.orientation.w = data[2].value[3]
 
     #odom linear & angular vel
@@ -140,35 +140,106 @@ def odom_send(data):
     return msg
 
 
+def values(datafield):
+    """Reads a Data field once and returns its values as a list of python numbers"""
+    value = datafield.value
+    return value.tolist() if hasattr(value, "tolist") else list(value)
+
+class ImuSender(object):
+    """Same as send() but fills the same preallocated Imu message at each call
+       and reads each Data field only once.
+    """
+    def __init__(self):
+        self.msg = Imu()
+
+    def __call__(self, data):
+        msg = self.msg
+        o, w, a = msg.orientation, msg.angular_velocity, msg.linear_acceleration
+        o.x, o.y, o.z, o.w = values(data[0])
+        w.x, w.y, w.z = values(data[1])
+        a.x, a.y, a.z = values(data[2])
+        stamp = values(data[3])
+        msg.header.stamp.sec = int(stamp[0])
+        msg.header.stamp.nanosec = int(stamp[1])
+        return msg
+
+class VelSender(object):
+    """Same as vel_send() but fills the same preallocated Twist message at each call
+       and reads each Data field only once.
+    """
+    def __init__(self):
+        self.msg = Twist()
+
+    def __call__(self, data):
+        l, a = self.msg.linear, self.msg.angular
+        l.x, l.y, l.z = values(data[0])
+        a.x, a.y, a.z = values(data[1])
+        return self.msg
+
+class OdomSender(object):
+    """Same as odom_send() but fills the same preallocated Odometry message at each call
+       and reads each Data field only once.
+    """
+    def __init__(self):
+        self.msg = Odometry()
+
+    def __call__(self, data):
+        msg = self.msg
+        stamp = values(data[0])
+        msg.header.stamp.sec = int(stamp[0])
+        msg.header.stamp.nanosec = int(stamp[1])
+
+        p, o = msg.pose.pose.position, msg.pose.pose.orientation
+        p.y, p.z, p.x = values(data[1])
+        o.y, o.z, o.x, o.w = values(data[2])
+
+        l, a = msg.twist.twist.linear, msg.twist.twist.angular
+        l.x, l.y, l.z = values(data[3])
+        a.x, a.y, a.z = values(data[4])
+        return msg
+
+
 class SummitxlROSController(Sofa.Core.Controller):
     """A Simple keyboard controller for the SummitXL
        Key UP, DOWN, LEFT, RIGHT to move
+
+       The optional 'latency' argument is a summitxl_latency.LatencyTracker
+       told when each step consumes the real robot odometry.
+
+       The optional 'estimator' argument is a summitxl_estimator.PoseEstimator
+       correcting the pose with each new real robot odometry, without it the
+       pose is only initialized once from the first odometry (init_pose).
+
+       The optional 'commands' argument is a summitxl_cmdbuffer.CommandBuffer
+       filled with the received [linear, angular] velocities stamped with the
+       simulated time. It is then sampled at 'simtime - commandDelay' and the
+       robot is moved by the step dt instead of the time between two odometry
+       timestamps.
     """
     def __init__(self, *args, **kwargs):
+        latency = kwargs.pop("latency", None)
+        estimator = kwargs.pop("estimator", None)
+        commands = kwargs.pop("commands", None)
+        commandDelay = kwargs.pop("commandDelay", 0.05)
         Sofa.Core.Controller.__init__(self, *args, **kwargs)
         self.robot = kwargs["robot"]
-        self.wheel_ray = 0.10
+        self.latency = latency
+        self.estimator = estimator
+        self.commands = commands
+        self.commandDelay = commandDelay
+        self.command = numpy.zeros(6)
+        self.wheels = summitxl_kinematics.SkidSteerWheels.fromChassis(self.robot.Chassis)
         self.flag = True
         self.robot.robot_linear_x = 0
         self.robot.robot_angular_z  = 0
         self.time_now = None
+        self.simtime = 0.
 
     def move(self, fwd, angle):
         """Move the robot using the forward speed and angular speed)"""
-        robot = RigidDof(self.robot.Chassis.position)
-        robot.translate(robot.forward * fwd)
-        robot.rotateAround([0, 1, 0], angle)
-        with self.robot.Chassis.WheelsMotors.angles.position.writeable() as angles:
-            #Make the wheel turn according to forward speed
-            # TODO: All the value are random, need to be really calculated
-            angles += (fwd/self.wheel_ray)
-
-            #Make the wheel turn in reverse mode according to turning speed
-            # TODO: the value are random, need to be really calculated
-            angles[0] += (angle)
-            angles[2] += (angle)
-            angles[1] -= (angle)
-            angles[3] -= (angle)
+        with self.robot.Chassis.position.position.writeable() as pose:
+            with self.robot.Chassis.WheelsMotors.angles.position.writeable() as angles:
+                summitxl_kinematics.move(pose[0], angles, fwd, angle, self.wheels)
 
     def init_pose(self):
         """
@@ -180,16 +251,9 @@ class SummitxlROSController(Sofa.Core.Controller):
             print("init summit_xl pose")
             with self.robot.Chassis.position.position.writeable() as summit_pose:
                 #position x, y z
-
-                summit_pose[0][0] = self.robot.reel_position[0]
-                summit_pose[0][1] = self.robot.reel_position[1]
-                summit_pose[0][2] = self.robot.reel_position[2]
-
+                summit_pose[0][0:3] = self.robot.reel_position.value
                 #orientaion x y z w
-                summit_pose[0][3] = self.robot.reel_orientation[0]
-                summit_pose[0][4] = self.robot.reel_orientation[1]
-                summit_pose[0][5] = self.robot.reel_orientation[2]
-                summit_pose[0][6] = self.robot.reel_orientation[3]
+                summit_pose[0][3:7] = self.robot.reel_orientation.value
             self.flag = False
 
 
@@ -197,40 +261,49 @@ class SummitxlROSController(Sofa.Core.Controller):
         """ At each time step we move the robot by the given
             forward_speed and angular_speed)
         """
+        self.simtime += event['dt']
+        if self.latency is not None:
+            self.latency.consumed(self.simtime)
+
         # time init
-        if self.time_now is not None:
-            dt = float(self.robot.timestamp.value[0])+float(self.robot.timestamp.value[1])/1000000000  - self.time_now
-            self.time_now = float(self.robot.timestamp.value[0])+float(self.robot.timestamp.value[1])/1000000000
+        stamp = self.robot.timestamp.value
+        time_now = float(stamp[0]) + float(stamp[1])/1000000000
+        dt = time_now - self.time_now if self.time_now is not None else 0
+        self.time_now = time_now
+
+        if self.commands is not None:
+            self.commands.now = self.simtime
+            command = self.commands.sample(self.simtime - self.commandDelay, self.command)
+            self.robot.robot_linear_x = command[0] * event['dt']
+            self.robot.robot_angular_z = command[5] * event['dt']
         else:
-            dt=0
-            self.time_now = float(self.robot.timestamp.value[0])+float(self.robot.timestamp.value[1])/1000000000
+            self.robot.robot_linear_x = self.robot.robot_linear_vel.value[0] * dt
+            self.robot.robot_angular_z = self.robot.robot_angular_vel.value[2] * dt
 
-        self.robot.robot_linear_x = self.robot.robot_linear_vel[0]  * dt
-        self.robot.robot_angular_z = self.robot.robot_angular_vel[2] * dt
+        # Each Data field is read once and the poses are copied as whole arrays
+        pose = self.robot.Chassis.position.position.value[0]
+        reel_position = self.robot.reel_position.value
+        reel_orientation = self.robot.reel_orientation.value
 
         with self.robot.Chassis.Debug.position.position.writeable() as debug_pose:
-            for i in range(0, 3):
-                debug_pose[0][i] =  self.robot.Chassis.position.position.value[0][i]
-
-            for i in range(0, 4):
-                debug_pose[0][3+i] = self.robot.reel_orientation[i]
+            debug_pose[0][0:3] = pose[0:3]
+            debug_pose[0][3:7] = reel_orientation
 
         with self.robot.Chassis.Reel_robot.position.position.writeable() as robot_pose:
-            for i in range(0,3):
-                robot_pose[0][i] =  self.robot.reel_position[i]
-
-            for i in range(0,4):
-                robot_pose[0][3+i] = self.robot.reel_orientation[i]
-
-        for i in range(0,4):
-            self.robot.sim_orientation[i] = self.robot.Chassis.position.position.value[0][3+i]
+            robot_pose[0][0:3] = reel_position
+            robot_pose[0][3:7] = reel_orientation
 
-        for i in range(0,3):
-            self.robot.sim_position[i] = self.robot.Chassis.position.position.value[0][i]
+        self.robot.sim_orientation.value = pose[3:7]
+        self.robot.sim_position.value = pose[0:3]
 
         self.move(self.robot.robot_linear_x, self.robot.robot_angular_z)
 
         # Wait to start receiving data from ROS to initialize the position
         # of the robot in the simulation with the position of the real robot
-        if self.robot.reel_position[0] != 0:
-            self.init_pose()
\ No newline at end of file
+        if reel_position[0] != 0:
+            if self.estimator is not None:
+                with self.robot.Chassis.position.position.writeable() as summit_pose:
+                    self.estimator.correct(summit_pose[0], reel_position, reel_orientation, time_now)
+                self.flag = False
+            else:
+                self.init_pose()
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""Publishes SOFA Data fields on ROS topics at a given rate, out of the simulation thread.
+
+The RateLimitedSender replaces sofaros.RosSender: at the end of a step it only
+copies its Data fields when the topic is due, then a BackgroundPublisher thread
+converts the copy into a message and publishes it. When the publisher lags
+behind, only the latest copy of each topic is kept.
+
+A sending function can also define capture(), called in the simulation thread
+when the Data fields are copied, and published(context), called by the thread
+with the value returned by capture() once the message is published.
+
+    publisher = BackgroundPublisher()
+    robot.addObject(RateLimitedSender(rosNode, "/sofa_sim/odom", fields, Odometry, OdomSender(),
+                                      rate=50., publisher=publisher))
+"""
+import threading
+import numpy
+import Sofa
+
+
+class Snapshot(object):
+    """Copy of a Data field, it has a 'value' like the field so the sending functions
+       can use both
+    """
+    __slots__ = ["value"]
+
+    def __init__(self, value):
+        self.value = value
+
+
+class BackgroundPublisher(object):
+    """A thread converting and publishing the snapshots of several topics"""
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="BackgroundPublisher", daemon=True)
+        self.thread.start()
+
+    def push(self, sender, snapshot, context=None):
+        """Queues the snapshot of a sender, replacing the one not yet published.
+           The context of a replaced snapshot is kept when the new one has none.
+        """
+        with self.condition:
+            if context is None and sender in self.pending:
+                context = self.pending[sender][1]
+            self.pending[sender] = (snapshot, context)
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.running and not self.pending:
+                    return
+                pending, self.pending = self.pending, {}
+            for sender, (snapshot, context) in pending.items():
+                try:
+                    sender.pub.publish(sender.sendingFn(snapshot))
+                    if sender.published is not None:
+                        sender.published(context)
+                except Exception as e:
+                    print("Unable to publish on {0}: {1}".format(sender.topic, e))
+
+    def stop(self):
+        """Publishes the remaining snapshots and stops the thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join()
+
+
+class RateLimitedSender(Sofa.Core.Controller):
+    """Publishes Data fields on a topic at most 'rate' times per second of simulated time.
+
+    Args:
+        rosNode: the ros node creating the publisher
+        topic (str): name of the topic
+        datafields (list): the Data fields given to sendingFn
+        msgtype: the ros message type
+        sendingFn: function returning the message from the Data fields
+        rate (float): publish rate in Hz of simulated time, None publishes at each step
+        publisher (BackgroundPublisher): thread publishing the messages, a new one
+                                         is started when None
+        qos (int): depth of the publisher queue
+    """
+    def __init__(self, rosNode, topic, datafields, msgtype, sendingFn, *args, **kwargs):
+        rate = kwargs.pop("rate", None)
+        publisher = kwargs.pop("publisher", None)
+        qos = kwargs.pop("qos", 10)
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        self.name = "RateLimitedSender"
+        self.topic = topic
+        self.datafields = datafields
+        self.sendingFn = sendingFn
+        self.capture = getattr(sendingFn, "capture", None)
+        self.published = getattr(sendingFn, "published", None)
+        self.period = 1. / rate if rate else 0.
+        self.elapsed = self.period
+        self.pub = rosNode.create_publisher(msgtype, topic, qos)
+        self.publisher = publisher if publisher is not None else BackgroundPublisher()
+
+    def onAnimateEndEvent(self, event):
+        self.elapsed += event['dt']
+        if self.elapsed < self.period - 1e-9:
+            return
+        self.elapsed = max(0., self.elapsed - self.period) % self.period if self.period else 0.
+        self.publisher.push(self, [Snapshot(numpy.array(d.value)) for d in self.datafields],
+                            self.capture() if self.capture is not None else None)
@@ -0,0 +1,43 @@
+"""Stamps of the samples produced on the simulated time, on the clock of the robot.
+
+The sofa_sim odom and scan messages carry the 'timestamp' of the real robot,
+which only changes when a new odometry is received. The samples produced at a
+higher rate (e.g. the IMU) are stamped on the same clock with a RobotClock:
+each time the timestamp changes, the offset between the robot clock and the
+simulated time is measured, and the simulated times of the samples are shifted
+by the last offset. Until the first odometry, the simulated time is used.
+
+    clock = RobotClock()
+    clock.update(robot.timestamp.value, simtime)
+    stamps, kept = clock.stamps(times)
+"""
+import numpy
+
+
+class RobotClock(object):
+    """Shifts simulated times onto the clock of a [sec, nanosec] timestamp.
+
+    The stamps it returns are strictly increasing: when the offset decreases
+    (an odometry received later than the previous one), the samples that would
+    go back in time are dropped.
+    """
+    def __init__(self):
+        self.offset = 0.
+        self.timestamp = (0, 0)
+        self.last = -numpy.inf
+
+    def update(self, timestamp, simtime):
+        """Measures the offset when the timestamp changed, a null timestamp is not received yet"""
+        timestamp = (int(timestamp[0]), int(timestamp[1]))
+        if timestamp == self.timestamp:
+            return
+        self.timestamp = timestamp
+        self.offset = timestamp[0] + timestamp[1] * 1e-9 - simtime
+
+    def stamps(self, times):
+        """Returns the stamps of increasing simulated times and the mask of the ones kept"""
+        stamps = times + self.offset
+        kept = stamps > self.last
+        if kept.any():
+            self.last = stamps[kept][-1]
+        return stamps, kept
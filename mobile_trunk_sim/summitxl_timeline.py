@@ -0,0 +1,127 @@
+"""Precomputed command timelines played in place of the keyboard.
+
+A timeline is a sorted sequence of timestamped commands stored as one
+structured array:
+
+    t         time in seconds from the start of the simulation
+    linear    forward velocity
+    angular   rotation velocity around Y in radians per second
+
+The command at time t is the last one whose timestamp is <= t, the robot
+stops before the first one. Timelines are saved as .npy files and memory
+mapped when loaded, so that a million step schedule is opened without
+reading it. They are played by the summitxl_controller.TimelinePlayback.
+
+    timeline = CommandTimeline.fromSegments([(1., 0.1, 0.), (0.5, 0., 0.2)])
+    timeline.save("square.npy")
+    createScene(rootNode, timeline="square.npy")
+"""
+import argparse
+import numpy
+
+dtype = numpy.dtype([("t", numpy.float64), ("linear", numpy.float64), ("angular", numpy.float64)])
+
+
+class CommandTimeline(object):
+    """Timestamped linear and angular velocity commands.
+
+    Args:
+        data: structured array of the timeline dtype, sorted by time
+    """
+    def __init__(self, data):
+        if data.dtype != dtype:
+            raise ValueError("Expected a timeline of dtype {0}, got {1}".format(dtype, data.dtype))
+        self.data = data
+        self.t = data["t"]
+        self.linear = data["linear"]
+        self.angular = data["angular"]
+
+    def __len__(self):
+        return len(self.data)
+
+    @staticmethod
+    def fromArrays(t, linear, angular):
+        data = numpy.empty(len(t), dtype=dtype)
+        data["t"] = t
+        data["linear"] = linear
+        data["angular"] = angular
+        if numpy.any(numpy.diff(data["t"]) < 0):
+            raise ValueError("The timeline timestamps are not sorted")
+        return CommandTimeline(data)
+
+    @staticmethod
+    def fromSegments(segments, start=0.):
+        """Returns the timeline of a list of (duration, linear, angular) segments,
+           the robot stops at the end of the last segment
+        """
+        durations = numpy.array([segment[0] for segment in segments] + [0.])
+        t = start + numpy.concatenate([[0.], numpy.cumsum(durations[:-1])])
+        linear = [segment[1] for segment in segments] + [0.]
+        angular = [segment[2] for segment in segments] + [0.]
+        return CommandTimeline.fromArrays(t, linear, angular)
+
+    @staticmethod
+    def load(filename):
+        return CommandTimeline(numpy.load(filename, mmap_mode="r"))
+
+    def save(self, filename):
+        numpy.save(filename, numpy.ascontiguousarray(self.data))
+
+
+class TimelineCursor(object):
+    """Finds the command active at a time.
+
+    Moving forward in time advances the cursor over the few commands in between,
+    which is O(1) per step when the timeline has about one command per step or
+    less. Moving backward falls back on a binary search.
+    """
+    def __init__(self, timeline):
+        self.t = timeline.t
+        self.index = -1
+
+    def seek(self, t):
+        """Returns the index of the active command, -1 before the first one"""
+        times = self.t
+        i = self.index
+        if i >= 0 and t < times[i]:
+            i = int(numpy.searchsorted(times, t, side="right")) - 1
+        else:
+            n = len(times)
+            # a few steps forward, then a binary search on the rest
+            for _ in range(8):
+                if i + 1 < n and times[i + 1] <= t:
+                    i += 1
+                else:
+                    break
+            else:
+                i += int(numpy.searchsorted(times[i + 1:], t, side="right"))
+        self.index = i
+        return i
+
+
+def randomTimeline(steps, dt=0.001, hold=200, speed=0.1, turn=0.1, seed=0):
+    """Returns a reproducible timeline of 'steps' steps changing of command every 'hold' steps"""
+    rng = numpy.random.default_rng(seed)
+    count = max(1, steps // hold)
+    t = numpy.arange(count) * hold * dt
+    linear = rng.integers(-1, 2, count) * speed
+    angular = rng.integers(-1, 2, count) * turn
+    return CommandTimeline.fromArrays(t, linear, angular)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a reproducible random command timeline.")
+    parser.add_argument("output", help="timeline .npy file")
+    parser.add_argument("--steps", type=int, default=1000000, help="number of simulation steps covered")
+    parser.add_argument("--dt", type=float, default=0.001, help="time step of the simulation")
+    parser.add_argument("--hold", type=int, default=1, help="steps between two commands")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random commands")
+    args = parser.parse_args()
+
+    timeline = randomTimeline(args.steps, args.dt, args.hold, seed=args.seed)
+    timeline.save(args.output)
+    print("{0} commands written in {1}".format(len(timeline), args.output))
+
+
+if __name__ == "__main__":
+    main()
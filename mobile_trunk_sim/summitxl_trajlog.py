@@ -0,0 +1,141 @@
+"""Record and replay of the real robot streams tracked by SummitxlROSController.
+
+The TrajectoryRecorder stores the odom and cmd_vel messages as decoded by
+odom_recv and vel_recv, with their reception time, in a columnar log:
+
+    odom_t            (n,)    reception time in seconds from the first message
+    odom_stamp        (n, 2)  header stamp [sec, nanosec]
+    odom_position     (n, 3)  reel_position
+    odom_orientation  (n, 4)  reel_orientation
+    cmd_t             (m,)    reception time in seconds from the first message
+    cmd_linear        (m, 3)  robot_linear_vel
+    cmd_angular       (m, 3)  robot_angular_vel
+
+The TrajectoryReplay controller feeds a robot from such a log, as fast as the
+simulation goes.
+"""
+import time
+import numpy
+import Sofa
+
+odomColumns = {"odom_t": (), "odom_stamp": (2,), "odom_position": (3,), "odom_orientation": (4,)}
+cmdColumns = {"cmd_t": (), "cmd_linear": (3,), "cmd_angular": (3,)}
+
+
+class Columns(object):
+    """Growable set of columns having the same number of rows"""
+    def __init__(self, shapes, capacity=4096):
+        self.data = {name: numpy.empty((capacity,) + shape,
+                                       dtype=numpy.int64 if name.endswith("stamp") else numpy.float64)
+                     for name, shape in shapes.items()}
+        self.count = 0
+
+    def append(self, **values):
+        if self.count == len(next(iter(self.data.values()))):
+            for name, column in self.data.items():
+                self.data[name] = numpy.concatenate([column, numpy.empty_like(column)])
+        for name, value in values.items():
+            self.data[name][self.count] = value
+        self.count += 1
+
+    def arrays(self):
+        return {name: column[:self.count] for name, column in self.data.items()}
+
+
+class TrajectoryRecorder(object):
+    """Records the decoded odom and cmd_vel streams.
+
+    Args:
+        clock: function returning the reception time in seconds
+    """
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.start = None
+        self.odom = Columns(odomColumns)
+        self.cmd = Columns(cmdColumns)
+
+    def now(self):
+        t = self.clock()
+        if self.start is None:
+            self.start = t
+        return t - self.start
+
+    def odomRecv(self, recv):
+        """Returns a receiving function calling recv (e.g. odom_recv) and recording
+           the values it wrote in the [timestamp, reel_position, reel_orientation] fields
+        """
+        def fn(data, datafield):
+            recv(data, datafield)
+            self.odom.append(odom_t=self.now(), odom_stamp=datafield[0].value,
+                             odom_position=datafield[1].value, odom_orientation=datafield[2].value)
+        return fn
+
+    def velRecv(self, recv):
+        """Returns a receiving function calling recv (e.g. vel_recv) and recording
+           the values it wrote in the [robot_linear_vel, robot_angular_vel] fields
+        """
+        def fn(data, datafield):
+            recv(data, datafield)
+            self.cmd.append(cmd_t=self.now(), cmd_linear=datafield[0].value, cmd_angular=datafield[1].value)
+        return fn
+
+    def save(self, filename):
+        numpy.savez_compressed(filename, **self.odom.arrays(), **self.cmd.arrays())
+
+
+def loadLog(filename):
+    """Returns the columns of a log as a dict of arrays"""
+    with numpy.load(filename) as log:
+        return {name: log[name] for name in log.files}
+
+
+class TrajectoryReplay(Sofa.Core.Controller):
+    """Feeds the robot Data fields from a recorded log, in place of the RosReceivers.
+
+    It must be added before the SummitxlROSController so that each step uses the
+    messages replayed at its beginning.
+
+    Args:
+        robot: the SummitXL node
+        log (str): the recorded log
+        timeScale (float): seconds of log replayed per second of simulated time
+        sink: optional pose sink receiving the chassis pose at the end of each step
+              (see summitxl_posesink)
+    """
+    def __init__(self, *args, **kwargs):
+        log = kwargs.pop("log")
+        timeScale = kwargs.pop("timeScale", 1.)
+        sink = kwargs.pop("sink", None)
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        self.robot = kwargs["robot"]
+        self.log = loadLog(log) if isinstance(log, str) else log
+        self.timeScale = timeScale
+        self.sink = sink
+        self.simtime = 0.
+        self.odom = 0
+        self.cmd = 0
+
+    def finished(self):
+        return self.odom >= len(self.log["odom_t"]) and self.cmd >= len(self.log["cmd_t"])
+
+    def onAnimateBeginEvent(self, event):
+        self.simtime += event['dt']
+        t = self.simtime * self.timeScale
+        log = self.log
+
+        odom = numpy.searchsorted(log["odom_t"], t, side="right")
+        if odom > self.odom:
+            self.robot.timestamp.value = log["odom_stamp"][odom - 1].tolist()
+            self.robot.reel_position.value = log["odom_position"][odom - 1]
+            self.robot.reel_orientation.value = log["odom_orientation"][odom - 1]
+            self.odom = odom
+
+        cmd = numpy.searchsorted(log["cmd_t"], t, side="right")
+        if cmd > self.cmd:
+            self.robot.robot_linear_vel.value = log["cmd_linear"][cmd - 1]
+            self.robot.robot_angular_vel.value = log["cmd_angular"][cmd - 1]
+            self.cmd = cmd
+
+    def onAnimateEndEvent(self, event):
+        if self.sink is not None:
+            self.sink.write(self.simtime, self.robot.Chassis.position.position.value[0])
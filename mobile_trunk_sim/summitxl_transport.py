@@ -0,0 +1,137 @@
+"""Transports connecting the SOFA Data fields of the SummitXL to topics.
+
+A transport creates the senders and receivers of a scene:
+
+    transport.sender(topic, datafields, msgtype, sendingFn, rate=..., publisher=...)
+    transport.receiver(topic, datafields, msgtype, recvFn)
+
+with the sending and receiving functions of summitxl_roscontroller. Two
+transports are available:
+
+    RosTransport    publishes on the ROS 2 graph through sofaros, the ROS node
+                    is only created when the first sender or receiver is added
+    LocalTransport  carries the same messages between the objects of the process,
+                    without DDS, to run and load test the ROS scenes on one machine
+
+The LocalTransport node has the create_publisher/create_subscription subset of
+an rclpy node, so the other end of the topics can be played in the same process:
+
+    transport = LocalTransport()
+    createScene(rootNode, transport=transport)
+    cmd = transport.node.create_publisher(Twist, "/summit_xl/robotnik_base_control/cmd_vel", 10)
+    transport.node.create_subscription(Odometry, "/sofa_sim/odom", onOdom, 10)
+"""
+import copy
+import threading
+import Sofa
+from summitxl_rospublisher import RateLimitedSender
+
+
+class RosTransport(object):
+    """Senders and receivers on the ROS 2 graph.
+
+    Args:
+        nodeName (str): name of the ROS node
+    """
+    def __init__(self, nodeName="SofaNode"):
+        self.nodeName = nodeName
+        self.rosNode = None
+
+    @property
+    def node(self):
+        if self.rosNode is None:
+            import sofaros
+            self.rosNode = sofaros.init(self.nodeName)
+        return self.rosNode
+
+    def sender(self, topic, datafields, msgtype, sendingFn, **kwargs):
+        """Returns a RateLimitedSender (see summitxl_rospublisher)"""
+        return RateLimitedSender(self.node, topic, datafields, msgtype, sendingFn, **kwargs)
+
+    def receiver(self, topic, datafields, msgtype, recvFn):
+        import sofaros
+        return sofaros.RosReceiver(self.node, topic, datafields, msgtype, recvFn)
+
+
+class LocalPublisher(object):
+    """Delivers the published messages to the subscriptions of its topic.
+
+    The messages are copied once per publication as the sending functions
+    reuse their message.
+    """
+    def __init__(self, bus, topic):
+        self.bus = bus
+        self.topic = topic
+        self.count = 0
+
+    def publish(self, msg):
+        self.count += 1
+        callbacks = self.bus.subscriptions.get(self.topic)
+        if callbacks:
+            msg = copy.deepcopy(msg) if self.bus.copy else msg
+            for callback in callbacks:
+                callback(msg)
+
+    def destroy(self):
+        pass
+
+
+class LocalNode(object):
+    """In-process stand-in of an rclpy node, the topics are matched by name only.
+
+    Args:
+        copy (bool): copy the messages when they are published
+    """
+    def __init__(self, copy=True):
+        self.copy = copy
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def create_publisher(self, msgtype, topic, qos=10):
+        return LocalPublisher(self, topic)
+
+    def create_subscription(self, msgtype, topic, callback, qos=10):
+        with self.lock:
+            # replaced rather than appended, a publication iterates over the previous list
+            self.subscriptions[topic] = self.subscriptions.get(topic, []) + [callback]
+        return callback
+
+
+class LocalReceiver(Sofa.Core.Controller):
+    """Applies the last message received on a topic at the beginning of the next step,
+       as sofaros.RosReceiver does.
+    """
+    def __init__(self, node, topic, datafields, msgtype, recvFn, *args, **kwargs):
+        Sofa.Core.Controller.__init__(self, *args, **kwargs)
+        self.name = "LocalReceiver"
+        self.topic = topic
+        self.datafields = datafields
+        self.recvFn = recvFn
+        self.data = None
+        node.create_subscription(msgtype, topic, self.callback)
+
+    def callback(self, data):
+        self.data = data
+
+    def onAnimateBeginEvent(self, event):
+        data, self.data = self.data, None
+        if data is not None:
+            self.recvFn(data, self.datafields)
+
+
+class LocalTransport(object):
+    """Senders and receivers exchanging messages inside the process.
+
+    Args:
+        copy (bool): copy the messages when they are published, False hands the
+                     message of the sender to the receivers
+    """
+    def __init__(self, copy=True):
+        self.node = LocalNode(copy)
+
+    def sender(self, topic, datafields, msgtype, sendingFn, **kwargs):
+        """Returns a RateLimitedSender (see summitxl_rospublisher) publishing on the local node"""
+        return RateLimitedSender(self.node, topic, datafields, msgtype, sendingFn, **kwargs)
+
+    def receiver(self, topic, datafields, msgtype, recvFn):
+        return LocalReceiver(self.node, topic, datafields, msgtype, recvFn)
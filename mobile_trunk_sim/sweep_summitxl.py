@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Parameter sweep of the summit_xl scene over a pool of headless SOFA processes.
+
+Each parameter set runs in its own worker process (one scene per process, the
+worker is replaced after each run) and drives the robot with the same scripted
+command trajectory. The final chassis pose and the step timings of every run
+are gathered in one CSV table.
+
+Example:
+    python3 sweep_summitxl.py --steps 5000 --param speed=0.1,0.2,0.4 --param turn=0.1,0.5 \\
+                              --param dt=0.001,0.005 --output sweep.csv
+
+The swept parameters are:
+    speed, turn   the initial speed and turn of the SummitxlController
+    wheelRadius   the wheel radius used by the skid steer kinematics
+    dt            the time step of the scene
+    gravity       the Y component of the scene gravity
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import time
+import numpy
+import summitxl_kinematics
+from summitxl_timeline import CommandTimeline
+
+defaults = {"speed": 0.1, "turn": 0.1, "wheelRadius": summitxl_kinematics.wheelRadius, "dt": 0.001, "gravity": -9810.}
+
+# Scripted command trajectory: (duration in seconds, forward, rotation) where
+# forward and rotation have the meaning of the moveBindings of the keyboard
+trajectories = {
+    "straight": [(1., 1, 0)],
+    "square": [(1., 1, 0), (0.5, 0, 1)] * 4,
+    "slalom": [(0.5, 1, 1), (0.5, 1, -1)] * 4,
+}
+
+poseColumns = ["x", "y", "z", "qx", "qy", "qz", "qw"]
+timingColumns = ["build_s", "steps_per_sec", "step_mean_us", "step_p50_us", "step_p99_us", "step_max_us"]
+
+
+def sweepScene(rootNode, sink, trajectory, speed, turn, wheelRadius, dt, gravity, checkpoint=None):
+    """The summit_xl scene without visual models driven by a scripted trajectory,
+       starting from the robot state of the checkpoint when one is given
+    """
+    import summit_xl
+    from summitxl_controller import Checkpointer
+    timeline = CommandTimeline.fromSegments([(duration, forward * speed, rotation * turn)
+                                             for duration, forward, rotation in trajectory])
+    summit_xl.createScene(rootNode, sink=sink, lod="none", dt=dt, gravity=[0., gravity, 0.], timeline=timeline,
+                          speed=speed, turn=turn, wheelRadius=wheelRadius)
+    if checkpoint is not None:
+        robot = rootNode.Modelling.SummitXL
+        robot.addObject(Checkpointer(name="Checkpointer", robot=robot, controller=robot.KeyboardController,
+                                     restore=checkpoint))
+    return rootNode
+
+
+def runOne(task):
+    """Runs one parameter set in the current process and returns its results row"""
+    import headless_summitxl
+    from summitxl_posesink import NullSink
+
+    index, params, trajectory, steps, checkpoint = task
+    timings = numpy.empty(steps)
+    start = time.perf_counter()
+    root, stepspersec = headless_summitxl.run(steps, NullSink(), createScene=sweepScene, timings=timings,
+                                              trajectory=trajectories[trajectory], checkpoint=checkpoint, **params)
+    build = time.perf_counter() - start - timings.sum()
+
+    row = {"run": index, "trajectory": trajectory, "steps": steps}
+    row.update(params)
+    row.update(zip(poseColumns, root.Modelling.SummitXL.Chassis.position.position.value[0].tolist()))
+    timings *= 1e6
+    row.update(zip(timingColumns, [build, stepspersec, timings.mean(), numpy.percentile(timings, 50),
+                                   numpy.percentile(timings, 99), timings.max()]))
+    return row
+
+
+def parameterSets(sweeps):
+    """Returns the cartesian product of the swept values, the other parameters keep their default"""
+    names = list(sweeps)
+    for values in itertools.product(*(sweeps[name] for name in names)):
+        params = dict(defaults)
+        params.update(zip(names, values))
+        yield params
+
+
+def parseParam(text):
+    name, _, values = text.partition("=")
+    if name not in defaults:
+        raise argparse.ArgumentTypeError("Unknown parameter '{0}', expected one of {1}".format(name, ", ".join(defaults)))
+    return name, [float(v) for v in values.split(",")]
+
+
+def sweep(sweeps, trajectory="square", steps=1000, jobs=None, checkpoint=None):
+    """Runs every parameter set over a process pool.
+
+    Args:
+        sweeps: dict of parameter name to the list of its values
+        trajectory (str): name of the scripted command trajectory
+        steps (int): number of simulation steps of each run
+        jobs (int): number of worker processes, all the cores by default
+        checkpoint (str): robot state every run starts from (see summitxl_checkpoint)
+
+    Returns:
+        the list of results rows, ordered as the parameter sets
+    """
+    tasks = [(i, params, trajectory, steps, checkpoint) for i, params in enumerate(parameterSets(sweeps))]
+    jobs = min(jobs or os.cpu_count(), len(tasks))
+    # A fresh process per scene: SOFA keeps global state that is not reset between scenes
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(jobs, maxtasksperchild=1) as pool:
+        rows = list(pool.imap_unordered(runOne, tasks))
+    return sorted(rows, key=lambda row: row["run"])
+
+
+def writeTable(rows, filename):
+    columns = ["run", "trajectory", "steps"] + list(defaults) + poseColumns + timingColumns
+    with open(filename, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweeps the summit_xl scene parameters over a process pool.")
+    parser.add_argument("--param", type=parseParam, action="append", default=[],
+                        help="swept parameter as name=v1,v2,... (speed, turn, wheelRadius, dt, gravity)")
+    parser.add_argument("--trajectory", choices=sorted(trajectories), default="square",
+                        help="scripted command trajectory played by every run")
+    parser.add_argument("--steps", type=int, default=1000, help="number of simulation steps of each run")
+    parser.add_argument("--jobs", type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument("--checkpoint", default=None, help="robot state every run starts from")
+    parser.add_argument("--output", default="sweep.csv", help="results table")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = sweep(dict(args.param), args.trajectory, args.steps, args.jobs, args.checkpoint)
+    writeTable(rows, args.output)
+    print("{0} runs in {1:.1f} s, results in {2}".format(len(rows), time.perf_counter() - start, args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import warnings
+import numpy
+from summitxl_bvh import TriangleBVH
+
+
+def randomTriangles(rng, count):
+    centers = rng.uniform(-3., 3., (count, 1, 3))
+    positions = (centers + rng.uniform(-0.3, 0.3, (count, 3, 3))).reshape(-1, 3)
+    return positions, numpy.arange(3 * count).reshape(-1, 3)
+
+
+def directions(count):
+    angles = numpy.linspace(-numpy.pi, numpy.pi, count)
+    return numpy.stack([numpy.sin(angles), numpy.zeros(count), numpy.cos(angles)], axis=1)
+
+
+def test_raycast_matches_brute_force():
+    rng = numpy.random.default_rng(0)
+    positions, triangles = randomTriangles(rng, 500)
+    bvh = TriangleBVH(positions, triangles, leafSize=4)
+    rays = numpy.concatenate([directions(360), rng.normal(size=(100, 3))])
+    rays /= numpy.linalg.norm(rays, axis=1)[:, None]
+    origin = numpy.array([0.1, 0.05, -0.2])
+
+    expected = numpy.minimum(bvh.intersect(origin, rays, slice(None)), 5.)
+    numpy.testing.assert_allclose(bvh.raycast(origin, rays, maxDistance=5.), expected)
+    assert numpy.any(expected < 5.)
+
+
+def test_raycast_hits_a_wall():
+    positions = [[-1., -1., 2.], [1., -1., 2.], [1., 1., 2.], [-1., 1., 2.]]
+    bvh = TriangleBVH(positions, [[0, 1, 2], [0, 2, 3]])
+    distances = bvh.raycast([0., 0., 0.], [[0., 0., 1.], [0., 0., -1.]], maxDistance=10.)
+    numpy.testing.assert_allclose(distances, [2., 10.])
+
+
+def test_degenerate_triangles_do_not_warn():
+    # the ray is parallel to the plane of the triangles: det = 0 and u, v are infinite
+    positions = [[1., 0., 1.], [1., -1., 0.], [1., -1., 0.], [1., 0., 1.], [1., 1., 2.], [1., -1., 2.]]
+    bvh = TriangleBVH(positions, [[0, 1, 2], [3, 4, 5]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        distances = bvh.intersect(numpy.zeros(3), numpy.array([[0., 0., 1.]]), slice(None))
+    assert distances[0] == numpy.inf
+
+
+def test_empty_bvh():
+    bvh = TriangleBVH(numpy.empty((0, 3)), numpy.empty((0, 3), dtype=int))
+    numpy.testing.assert_array_equal(bvh.raycast([0., 0., 0.], directions(4), maxDistance=3.), [3.] * 4)
@@ -0,0 +1,76 @@
+import contextlib
+import numpy
+import pytest
+import summitxl_checkpoint
+from summitxl_cmdbuffer import CommandBuffer
+from summitxl_estimator import PoseEstimator
+
+
+class Field(object):
+    """A Data field holding a numpy value"""
+    def __init__(self, value):
+        self.value = numpy.array(value, dtype=numpy.float64)
+
+    @contextlib.contextmanager
+    def writeable(self):
+        yield self.value
+
+
+class Node(object):
+    pass
+
+
+def robot(k):
+    node, chassis = Node(), Node()
+    node.Chassis = chassis
+    chassis.position, chassis.WheelsMotors, chassis.FixedSensor = Node(), Node(), Node()
+    chassis.WheelsMotors.angles, chassis.FixedSensor.angles = Node(), Node()
+    chassis.position.position = Field(numpy.arange(7.)[None, :] * k)
+    chassis.WheelsMotors.angles.position = Field(numpy.full((5, 1), k))
+    chassis.FixedSensor.angles.position = Field(numpy.full((5, 1), 2. * k))
+    fields = {name: Field(numpy.full(n, k + i)) for i, (name, n) in enumerate(summitxl_checkpoint.dataFields)}
+    node.findData = fields.get
+    return node
+
+
+def controller(time_now, flag, last):
+    c = Node()
+    c.time_now, c.flag, c.simtime = time_now, flag, 0.
+    c.estimator = PoseEstimator()
+    c.estimator.last = last
+    c.commands = CommandBuffer()
+    return c
+
+
+def test_save_load(tmp_path):
+    state = numpy.random.default_rng(0).normal(size=summitxl_checkpoint.size)
+    filename = str(tmp_path / "run.ckpt")
+    summitxl_checkpoint.save(filename, state)
+    numpy.testing.assert_array_equal(summitxl_checkpoint.load(filename), state)
+    assert not (tmp_path / "run.ckpt.tmp").exists()
+
+
+def test_snapshot_restore_round_trip(tmp_path):
+    source, target = robot(1.), robot(0.)
+    sourceController, targetController = controller(3.5, False, 3.4), controller(None, True, None)
+    sourceController.commands.push(1., numpy.arange(6.))
+    sourceController.commands.now = 1.2
+
+    filename = str(tmp_path / "run.ckpt")
+    summitxl_checkpoint.save(filename, summitxl_checkpoint.snapshot(source, sourceController))
+    summitxl_checkpoint.restore(target, summitxl_checkpoint.load(filename), targetController)
+
+    numpy.testing.assert_array_equal(summitxl_checkpoint.snapshot(target, targetController),
+                                     summitxl_checkpoint.snapshot(source, sourceController))
+    assert targetController.time_now == 3.5 and targetController.flag is False
+    assert targetController.estimator.last == 3.4
+    assert targetController.commands.sample(5., numpy.zeros(6))[5] == 5.
+
+
+def test_restore_without_controller():
+    state = summitxl_checkpoint.snapshot(robot(1.), controller(1., False, None))
+    target = robot(0.)
+    summitxl_checkpoint.restore(target, state)
+    numpy.testing.assert_array_equal(target.Chassis.position.position.value, robot(1.).Chassis.position.position.value)
+    with pytest.raises(ValueError):
+        summitxl_checkpoint.restore(target, state[:10])
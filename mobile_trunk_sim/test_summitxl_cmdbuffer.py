@@ -0,0 +1,50 @@
+import numpy
+from summitxl_cmdbuffer import CommandBuffer, bufferedRecv
+
+
+def test_hold_after_the_last_command():
+    buffer = CommandBuffer(width=1)
+    buffer.push(0., [0.1])
+    buffer.push(0.5, [0.])
+    out = numpy.zeros(1)
+    for t in [0.5, 0.6, 1., 100.]:
+        assert buffer.sample(t, out)[0] == 0.
+
+
+def test_interpolation_between_commands():
+    buffer = CommandBuffer(width=1)
+    out = numpy.full(1, 7.)
+    assert buffer.sample(1., out)[0] == 7.
+    buffer.push(0., [0.])
+    buffer.push(1., [1.])
+    buffer.push(2., [3.])
+    assert buffer.sample(-1., out)[0] == 0.
+    assert buffer.sample(0.25, out)[0] == 0.25
+    assert buffer.sample(1.5, out)[0] == 2.
+
+
+def test_ring_buffer_wraps():
+    buffer = CommandBuffer(size=4, width=1)
+    for i in range(10):
+        buffer.push(float(i), [float(i)])
+    out = numpy.zeros(1)
+    assert buffer.sample(7.5, out)[0] == 7.5
+    # older than the values kept
+    assert buffer.sample(2., out)[0] == 6.
+
+
+def test_received_values_are_stamped_with_the_simulated_time():
+    class Field(object):
+        value = [0., 0., 0.]
+
+    fields = [Field(), Field()]
+
+    def recv(data, datafield):
+        datafield[0].value = [data, 0., 0.]
+
+    buffer = CommandBuffer()
+    fn = bufferedRecv(buffer, recv)
+    buffer.now = 2.
+    fn(0.3, fields)
+    assert buffer.count == 1 and buffer.times[0] == 2.
+    assert buffer.sample(5., numpy.zeros(6))[0] == 0.3
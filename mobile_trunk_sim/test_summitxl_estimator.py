@@ -0,0 +1,36 @@
+from math import pi, sin, cos
+import pytest
+from summitxl_estimator import PoseEstimator, yawOf
+
+
+def yawQuaternion(yaw):
+    return [0., sin(yaw * 0.5), 0., cos(yaw * 0.5)]
+
+
+def test_first_odometry_initializes_the_pose():
+    pose = [0., 0., 0., 0., 0., 0., 1.]
+    PoseEstimator().correct(pose, [1., 0., 2.], yawQuaternion(0.5), 1.)
+    assert pose[0:3] == [1., 0., 2.]
+    assert yawOf(pose[3:7]) == pytest.approx(0.5)
+
+
+def test_correction_converges():
+    estimator = PoseEstimator(timeConstant=0.5)
+    pose = [0., 0., 0., 0., 0., 0., 1.]
+    estimator.correct(pose, [0., 0., 0.], yawQuaternion(0.), 0.)
+    estimator.correct(pose, [1., 0., 0.], yawQuaternion(0.), 0.5)
+    assert pose[0] == pytest.approx(1. - 1. / 2.718281828459045)
+    # the same odometry is only used once
+    estimator.correct(pose, [1., 0., 0.], yawQuaternion(0.), 0.5)
+    assert pose[0] == pytest.approx(1. - 1. / 2.718281828459045)
+
+
+def test_yaw_error_wraps_around():
+    estimator = PoseEstimator(timeConstant=0.5)
+    pose = [0., 0., 0.] + yawQuaternion(pi - 0.1)
+    estimator.correct(pose, [0., 0., 0.], yawQuaternion(pi - 0.1), 0.)
+    estimator.correct(pose, [0., 0., 0.], yawQuaternion(-pi + 0.1), 10.)
+    # the short way is the +0.2 rad turn through pi, not the -6.08 rad one
+    assert estimator.error[3] == pytest.approx(0.2)
+    yaw = (yawOf(pose[3:7]) + pi) % (2. * pi) - pi
+    assert yaw == pytest.approx(-pi + 0.1, abs=1e-6)
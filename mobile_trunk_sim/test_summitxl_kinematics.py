@@ -0,0 +1,39 @@
+import numpy
+from summitxl_kinematics import SkidSteerWheels, FleetKinematics, move
+
+wheelPositions = [[-0.22, 0., 0.23], [0.22, 0., 0.23], [-0.22, 0., -0.23], [0.22, 0., -0.23]]
+
+
+def randomPoses(rng, count):
+    poses = numpy.zeros((count, 7))
+    poses[:, 0:3] = rng.uniform(-2., 2., (count, 3))
+    yaw = rng.uniform(-numpy.pi, numpy.pi, count)
+    poses[:, 4] = numpy.sin(yaw * 0.5)
+    poses[:, 6] = numpy.cos(yaw * 0.5)
+    return poses
+
+
+def test_fleet_matches_move():
+    rng = numpy.random.default_rng(0)
+    wheels = SkidSteerWheels(wheelPositions, count=5)
+    poses = randomPoses(rng, 6)
+    angles = rng.uniform(-1., 1., (6, 5))
+    fwd = rng.uniform(-0.01, 0.01, 6)
+    angle = rng.uniform(-0.05, 0.05, 6)
+
+    expectedPoses, expectedAngles = poses.copy(), angles.copy()
+    for i in range(6):
+        move(expectedPoses[i], expectedAngles[i], fwd[i], angle[i], wheels)
+    FleetKinematics(6, wheels).step(poses, angles, fwd, angle)
+
+    numpy.testing.assert_allclose(poses, expectedPoses, atol=1e-12)
+    numpy.testing.assert_allclose(angles, expectedAngles, atol=1e-12)
+
+
+def test_wheels_column_angles():
+    wheels = SkidSteerWheels(wheelPositions, count=5)
+    pose = numpy.array([0., 0., 0., 0., 0., 0., 1.])
+    angles = numpy.zeros((5, 1))
+    move(pose, angles, 0.1175, 0., wheels)
+    numpy.testing.assert_allclose(angles.ravel(), [1., 1., 1., 1., 0.])
+    numpy.testing.assert_allclose(pose[0:3], [0., 0., 0.1175])
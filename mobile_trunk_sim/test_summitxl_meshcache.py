@@ -0,0 +1,46 @@
+import os
+import numpy
+import summitxl_meshcache
+
+square = """v 0 0 0
+v 1 0 0
+v 1 1 0
+v 0 1 0
+f 1 2 3 4
+"""
+
+
+def entries(directory):
+    return sorted(entry for entry in os.listdir(directory) if entry.endswith(".npy"))
+
+
+def test_cache_is_invalidated(tmp_path, monkeypatch):
+    cachedir = tmp_path / "cache"
+    monkeypatch.setattr(summitxl_meshcache, "cachedir", str(cachedir))
+    mesh = tmp_path / "square.obj"
+    mesh.write_text(square)
+
+    positions, triangles = summitxl_meshcache.loadMesh(str(mesh), scale=2)
+    numpy.testing.assert_allclose(positions[2], [2., 2., 0.])
+    assert len(triangles) == 2
+    first = entries(cachedir)
+    assert len(first) == 2
+
+    # read back from the cache, memory mapped
+    positions, _ = summitxl_meshcache.loadMesh(str(mesh), scale=2)
+    assert isinstance(positions, numpy.memmap)
+    assert entries(cachedir) == first
+
+    # a new transform makes a new entry and removes the stale one
+    positions, _ = summitxl_meshcache.loadMesh(str(mesh), translation=[0, 0, 1], scale=2)
+    numpy.testing.assert_allclose(positions[2], [2., 2., 1.])
+    second = entries(cachedir)
+    assert len(second) == 2 and not set(first) & set(second)
+
+    # editing the file rebuilds the entry
+    mesh.write_text(square.replace("v 1 1 0", "v 1 3 0"))
+    positions, _ = summitxl_meshcache.loadMesh(str(mesh), translation=[0, 0, 1], scale=2)
+    numpy.testing.assert_allclose(positions[2], [2., 6., 1.])
+    third = entries(cachedir)
+    assert len(third) == 2 and not set(second) & set(third)
+    assert not [entry for entry in os.listdir(cachedir) if entry.endswith(".tmp")]
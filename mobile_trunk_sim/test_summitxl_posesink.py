@@ -0,0 +1,44 @@
+import io
+import numpy
+import pytest
+from summitxl_posesink import TrajectoryFileSink, DecimatedSink, loadTrajectory, createSink
+
+
+def poses(count):
+    rng = numpy.random.default_rng(0)
+    return numpy.arange(count) * 0.01, rng.normal(size=(count, 7))
+
+
+def test_trajectory_file_round_trip(tmp_path):
+    filename = str(tmp_path / "trajectory.bin")
+    times, values = poses(10)
+    # a buffer smaller than the trajectory so that it is flushed while writing
+    sink = TrajectoryFileSink(filename, buffersize=4)
+    for t, pose in zip(times, values):
+        sink.write(t, pose)
+    sink.close()
+    sink.close()
+
+    records = loadTrajectory(filename)
+    assert records.shape == (10, 8)
+    numpy.testing.assert_array_equal(records[:, 0], times)
+    numpy.testing.assert_array_equal(records[:, 1:], values)
+
+
+def test_decimated_sink_stride():
+    stream = io.StringIO()
+    sink = DecimatedSink(every=3, stream=stream)
+    times, values = poses(10)
+    for t, pose in zip(times, values):
+        sink.write(t, pose)
+    sink.close()
+
+    lines = stream.getvalue().splitlines()
+    # the steps 0, 3, 6 and 9 are forwarded
+    assert [line.split()[0] for line in lines] == ["t={0:.4f}".format(times[i]) for i in (0, 3, 6, 9)]
+    assert len(lines[1].split()) == 8
+
+
+def test_unknown_sink():
+    with pytest.raises(ValueError):
+        createSink("unknown")
@@ -0,0 +1,35 @@
+import numpy
+from summitxl_stamps import RobotClock
+
+
+def steps(clock, timestamps, dt=0.01, rate=200.):
+    """Stamps the samples of the steps as the ImuModel does, one timestamp per step"""
+    stamps = []
+    for k, timestamp in enumerate(timestamps):
+        t0, t1 = k * dt, (k + 1) * dt
+        times = numpy.arange(t0 + 1. / rate, t1 + 1e-12, 1. / rate)
+        clock.update(timestamp, t1)
+        s, kept = clock.stamps(times)
+        stamps.extend(s[kept])
+    return numpy.array(stamps)
+
+
+def test_fixed_timestamp_keeps_increasing():
+    stamps = steps(RobotClock(), [[100, 0]] * 6)
+    assert len(stamps) == 12
+    assert numpy.all(numpy.diff(stamps) > 0.)
+    numpy.testing.assert_allclose(stamps[:2], [99.995, 100.])
+    numpy.testing.assert_allclose(stamps[-1], 100.05)
+
+
+def test_simulated_time_until_the_first_odometry():
+    stamps = steps(RobotClock(), [[0, 0]] * 3 + [[100, 0]] * 2)
+    numpy.testing.assert_allclose(stamps[:6], numpy.arange(1, 7) * 0.005)
+    numpy.testing.assert_allclose(stamps[6:], [99.995, 100., 100.005, 100.01])
+
+
+def test_stamps_never_go_back():
+    # the second odometry arrives late: the offset decreases
+    stamps = steps(RobotClock(), [[100, 0], [100, 0], [100, 5000000], [100, 20000000]])
+    assert numpy.all(numpy.diff(stamps) > 0.)
+    numpy.testing.assert_allclose(stamps[-1], 100.02)
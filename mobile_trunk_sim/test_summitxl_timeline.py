@@ -0,0 +1,33 @@
+import numpy
+import pytest
+from summitxl_timeline import CommandTimeline, TimelineCursor, randomTimeline
+
+
+def test_cursor_matches_searchsorted():
+    rng = numpy.random.default_rng(0)
+    t = numpy.sort(rng.uniform(0., 10., 200))
+    t[50:60] = t[50]
+    timeline = CommandTimeline.fromArrays(t, numpy.zeros(200), numpy.zeros(200))
+    cursor = TimelineCursor(timeline)
+    # forward steps of several sizes, then jumps backward and forward
+    queries = numpy.concatenate([numpy.arange(-1., 11., 0.001), numpy.arange(0., 11., 0.5),
+                                 rng.uniform(-1., 11., 500), [t[50], t[49], t[-1]]])
+    for q in queries:
+        assert cursor.seek(q) == numpy.searchsorted(t, q, side="right") - 1
+
+
+def test_segments_and_save_load(tmp_path):
+    timeline = CommandTimeline.fromSegments([(1., 0.1, 0.), (0.5, 0., 0.2)])
+    numpy.testing.assert_allclose(timeline.t, [0., 1., 1.5])
+    numpy.testing.assert_allclose(timeline.linear, [0.1, 0., 0.])
+    numpy.testing.assert_allclose(timeline.angular, [0., 0.2, 0.])
+
+    filename = str(tmp_path / "timeline.npy")
+    randomTimeline(1000, seed=3).save(filename)
+    loaded = CommandTimeline.load(filename)
+    numpy.testing.assert_array_equal(loaded.data, randomTimeline(1000, seed=3).data)
+
+
+def test_unsorted_timeline():
+    with pytest.raises(ValueError):
+        CommandTimeline.fromArrays([1., 0.], [0., 0.], [0., 0.])
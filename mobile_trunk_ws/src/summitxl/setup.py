@@ -21,7 +21,8 @@ setup(
     entry_points={
         'console_scripts': [
             'summitxl_teleop_key = summitxl.summitxl_teleop_key:main',
-            'summitxl_node = summitxl.summitxl_node:main'
+            'summitxl_node = summitxl.summitxl_node:main',
+            'summitxl_odom_standin = summitxl.summitxl_odom_standin:main'
         ],
     },
 )
@@ -1,44 +1,145 @@
 # coding: utf8
 #!/usr/bin/env python3
+"""Publishes a constant [linear, 0, 0, 0, 0, angular] command.
+
+It doubles as a load generator for the sim receivers, e.g. 8 publishers
+at 1 kHz with 1024 floats per message:
+
+    ros2 run summitxl summitxl_node 0.1 0.1 --rate 1000 --payload 1024 --instances 8
+"""
+import argparse
+import array
+import math
+import sys
+import time
 import std_msgs
 from std_msgs.msg import Float32MultiArray
 import rclpy
 from rclpy.node import Node
-import sys
+from rclpy.executors import SingleThreadedExecutor
+from rclpy.qos import QoSProfile, ReliabilityPolicy
+
+reliabilities = {"reliable": ReliabilityPolicy.RELIABLE, "best_effort": ReliabilityPolicy.BEST_EFFORT}
+
+
+class PublishStats(object):
+    """Achieved rate and jitter of the intervals between publications"""
+    def __init__(self, period):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.last = None
+        self.start = None
+        self.count = 0
+        self.sum = 0.
+        self.sumsq = 0.
+        self.max = 0.
+
+    def tick(self, now):
+        if self.last is None:
+            self.start = now
+        else:
+            interval = now - self.last
+            self.count += 1
+            self.sum += interval
+            self.sumsq += interval * interval
+            self.max = max(self.max, abs(interval - self.period))
+        self.last = now
+
+    def rate(self):
+        return self.count / self.sum if self.sum > 0. else 0.
+
+    def jitter(self):
+        """Standard deviation of the intervals in seconds"""
+        if self.count < 2:
+            return 0.
+        mean = self.sum / self.count
+        return math.sqrt(max(0., self.sumsq / self.count - mean * mean))
+
 
 class MinimalPublisher(Node):
+    """Publishes the same Float32MultiArray at a fixed rate.
 
-    def __init__(self, arg):
-        super().__init__('summit_xl_node')
-        self.publisher_ = self.create_publisher(Float32MultiArray, '/summit_xl_control/cmd_vel', 10)
-        timer_period = 0.05  # seconds
+    Args:
+        arg: [linear_vel, angular_vel]
+        rate (float): publications per second
+        qos: QoS profile or history depth of the publisher
+        payload (int): number of floats of the message, at least 6
+        name (str): name of the node
+        topic (str): topic of the command
+    """
+    def __init__(self, arg, rate=20., qos=10, payload=6, name='summit_xl_node', topic='/summit_xl_control/cmd_vel'):
+        super().__init__(name)
+        self.publisher_ = self.create_publisher(Float32MultiArray, topic, qos)
+        timer_period = 1. / rate  # seconds
         self.timer = self.create_timer(timer_period, self.timer_callback)
         self.linear_vel = arg[0]
         self.angular_vel = arg[1]
 
+        data = array.array('f', bytes(4 * max(6, payload)))
+        data[0] = self.linear_vel
+        data[5] = self.angular_vel
+        # The message is built once and published as is at each tick
+        self.msg = Float32MultiArray(layout=std_msgs.msg.MultiArrayLayout(data_offset=0), data=data)
+        self.stats = PublishStats(timer_period)
+
     def timer_callback(self):
+        self.publisher_.publish(self.msg)
+        self.stats.tick(time.monotonic())
+
+    def report(self):
+        """Logs the achieved rate and jitter since the last report"""
+        stats = self.stats
+        self.get_logger().info("{0:.1f} msg/s (target {1:.1f}), jitter {2:.3f} ms, max deviation {3:.3f} ms".format(
+            stats.rate(), 1. / stats.period, stats.jitter() * 1e3, stats.max * 1e3))
+        last = stats.last
+        stats.reset()
+        stats.last = last
 
-        msg = Float32MultiArray(layout=std_msgs.msg.MultiArrayLayout( data_offset=0), data=[self.linear_vel,0.,
-                                                                        0.,0.,0.,self.angular_vel])
-        self.publisher_.publish(msg)
 
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Publishes a constant command, or loads the sim receivers.")
+    parser.add_argument("linear", type=float, nargs="?", default=0., help="linear velocity")
+    parser.add_argument("angular", type=float, nargs="?", default=0., help="angular velocity")
+    parser.add_argument("--rate", type=float, default=20., help="publications per second of each instance")
+    parser.add_argument("--depth", type=int, default=10, help="QoS history depth")
+    parser.add_argument("--reliability", choices=sorted(reliabilities), default="reliable", help="QoS reliability")
+    parser.add_argument("--payload", type=int, default=6, help="number of floats per message (at least 6)")
+    parser.add_argument("--instances", type=int, default=1, help="number of publisher nodes")
+    parser.add_argument("--topic", default='/summit_xl_control/cmd_vel', help="published topic")
+    parser.add_argument("--report", type=float, default=5., help="seconds between two rate reports, 0 disables them")
+    options, _ = parser.parse_known_args((args if args is not None else sys.argv)[1:])
 
-def main(args):
-    vel = [float(args[1]) ,float(args[2])]
+    vel = [options.linear, options.angular]
+    qos = QoSProfile(depth=options.depth, reliability=reliabilities[options.reliability])
     rclpy.init()
 
-    minimal_publisher = MinimalPublisher(vel)
+    executor = SingleThreadedExecutor()
+    publishers = []
+    for i in range(options.instances):
+        name = 'summit_xl_node' if options.instances == 1 else 'summit_xl_node{0}'.format(i)
+        publishers.append(MinimalPublisher(vel, options.rate, qos, options.payload, name, options.topic))
+        executor.add_node(publishers[-1])
 
-    rclpy.spin(minimal_publisher)
+    if options.report > 0.:
+        def report():
+            for publisher in publishers:
+                publisher.report()
+        publishers[0].create_timer(options.report, report)
+
+    try:
+        executor.spin()
+    except KeyboardInterrupt:
+        pass
 
     # Destroy the node explicitly
     # (optional - otherwise it will be done automatically
     # when the garbage collector destroys the node object)
-    minimal_publisher.destroy_node()
+    for publisher in publishers:
+        publisher.destroy_node()
     rclpy.shutdown()
 
 
 if __name__ == '__main__':
-    print(len(sys.argv))
-
-    main(sys.argv)
\ No newline at end of file
+    main(sys.argv)
@@ -0,0 +1,72 @@
+# coding: utf8
+#!/usr/bin/env python3
+"""Stand-in for the real robot odometry, to run the ROS scene without a robot."""
+import math
+import sys
+
+from nav_msgs.msg import Odometry
+import rclpy
+from rclpy.node import Node
+
+
+class OdomStandin(Node):
+    """Publishes the odometry of a robot driving on a circle.
+
+    The messages are stamped with the node clock so that the latency
+    instrumentation of the simulation (summitxl_latency) can be driven
+    without the real robot.
+    """
+
+    def __init__(self, rate=50.0, linear_vel=0.2, angular_vel=0.1):
+        super().__init__('summit_xl_odom_standin')
+        self.publisher_ = self.create_publisher(Odometry, '/summit_xl/robotnik_base_control/odom', 10)
+        self.timer = self.create_timer(1.0 / rate, self.timer_callback)
+        self.linear_vel = linear_vel
+        self.angular_vel = angular_vel
+        self.msg = Odometry()
+        self.msg.header.frame_id = 'summit_xl_odom'
+        self.msg.child_frame_id = 'summit_xl_base_footprint'
+        self.x = 0.0
+        self.y = 0.0
+        self.th = 0.0
+        self.last = None
+
+    def timer_callback(self):
+        """Integrate the robot pose and publish it."""
+        now = self.get_clock().now()
+        if self.last is not None:
+            dt = (now - self.last).nanoseconds * 1e-9
+            self.x += self.linear_vel * math.cos(self.th) * dt
+            self.y += self.linear_vel * math.sin(self.th) * dt
+            self.th += self.angular_vel * dt
+        self.last = now
+
+        msg = self.msg
+        msg.header.stamp = now.to_msg()
+        # Start away from y = 0, the simulation waits for a non null position
+        msg.pose.pose.position.x = self.x
+        msg.pose.pose.position.y = 1.0 + self.y
+        msg.pose.pose.orientation.z = math.sin(self.th / 2)
+        msg.pose.pose.orientation.w = math.cos(self.th / 2)
+        msg.twist.twist.linear.x = self.linear_vel
+        msg.twist.twist.angular.z = self.angular_vel
+        self.publisher_.publish(msg)
+
+
+def main(args=None):
+    """Run the stand-in: summitxl_odom_standin [rate] [linear_vel] [angular_vel]."""
+    args = sys.argv[1:] if args is None else args
+    values = [float(a) for a in args[:3]]
+    rclpy.init()
+
+    node = OdomStandin(*values)
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        pass
+    node.destroy_node()
+    rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
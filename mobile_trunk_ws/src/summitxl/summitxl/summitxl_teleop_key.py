@@ -1,6 +1,10 @@
 # coding: utf8
 #!/usr/bin/env python3
 import sys
+import os
+import time
+import select
+import argparse
 import rclpy
 from geometry_msgs.msg import Twist
 import termios
@@ -57,10 +61,104 @@ def saveTerminalSettings():
 def restoreTerminalSettings(old_settings):
    termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
 
+def pollKey(timeout):
+   """Returns the pressed key, or '' when no key is pressed before timeout.
+      The terminal must already be in raw mode.
+   """
+   ready, _, _ = select.select([sys.stdin], [], [], max(0., timeout))
+   if not ready:
+      return ''
+   # os.read bypasses the buffering of sys.stdin that would hide keys from select
+   return os.read(sys.stdin.fileno(), 1).decode(errors='ignore')
+
 def vels(speed, turn):
    return 'currently:\tspeed %s\tturn %s ' % (speed, turn)
 
+class TeleopState(object):
+   """The command selected with the keyboard"""
+   def __init__(self, speed=0.1, turn=0.1):
+      self.speed = speed
+      self.turn = turn
+      self.x = 0.0
+      self.th = 0.0
+      self.status = 0.
+
+   def handle(self, key):
+      """Updates the command with a key, returns False on CTRL-C"""
+      if key in moveBindings.keys():
+         self.x = moveBindings[key][0]
+         self.th = moveBindings[key][3]
+      elif key in speedBindings.keys():
+         self.speed = self.speed * speedBindings[key][0]
+         self.turn = self.turn * speedBindings[key][1]
+
+         print(vels(self.speed, self.turn))
+         if (self.status == 14):
+            print(msg)
+         self.status = (self.status + 1) % 15
+      else:
+         self.x = 0.0
+         self.th = 0.0
+         if (key == '\x03'):
+            return False
+      return True
+
+   def stop(self):
+      self.x = 0.0
+      self.th = 0.0
+
+   def fill(self, twist):
+      twist.linear.x = self.x * self.speed
+      twist.linear.y = 0.
+      twist.linear.z = 0.
+      twist.angular.x = 0.
+      twist.angular.y = 0.
+      twist.angular.z = self.th * self.turn
+      return twist
+
+def runOnKeypress(pub, settings, state, twist):
+   """Publishes the command each time a key is pressed"""
+   while True:
+      key = getKey(settings)
+      if not state.handle(key):
+         break
+      pub.publish(state.fill(twist))
+
+def runFixedRate(pub, state, twist, rate, hold):
+   """Publishes the command at a fixed rate, the terminal being put in raw mode once.
+
+      The keys are polled without blocking between two publications. As the terminal
+      only repeats a held key, the robot stops when no key was pressed for 'hold' seconds.
+   """
+   period = 1. / rate
+   tty.setraw(sys.stdin.fileno())
+   lastKey = time.monotonic()
+   deadline = lastKey + period
+   while True:
+      key = pollKey(deadline - time.monotonic())
+      now = time.monotonic()
+      if key:
+         if not state.handle(key):
+            break
+         lastKey = now
+      if now < deadline:
+         continue
+      if now - lastKey > hold and (state.x != 0.0 or state.th != 0.0):
+         state.stop()
+      pub.publish(state.fill(twist))
+      deadline += period
+      if now > deadline:
+         # too late, the missed publications are dropped instead of being sent in a burst
+         deadline = now + period
+
 def main():
+   parser = argparse.ArgumentParser(description="Publishes the keyboard commands as Twist messages.")
+   parser.add_argument("--rate", type=float, default=0.,
+                       help="publish rate in Hz, the command is only published on keypress when 0")
+   parser.add_argument("--hold", type=float, default=0.6,
+                       help="with --rate, seconds without keypress after which the robot stops")
+   args, _ = parser.parse_known_args()
+
    settings = saveTerminalSettings()
 
    rclpy.init()
@@ -68,53 +166,23 @@ def main():
    node = rclpy.create_node('teleop_twist_keyboard')
    pub = node.create_publisher(Twist, '/summit_xl/robotnik_base_control/cmd_vel', 10)
 
-   speed = 0.1
-   turn = 0.1
-   x = 0.0
-   th = 0.0
-   status = 0.
+   state = TeleopState()
+   twist = Twist()
 
    try:
       print(msg)
-      print(vels(speed, turn))
-      while True:
-            key = getKey(settings)
-            if key in moveBindings.keys():
-               x = moveBindings[key][0]
-               th = moveBindings[key][3]
-            elif key in speedBindings.keys():
-               speed = speed * speedBindings[key][0]
-               turn = turn * speedBindings[key][1]
-
-               print(vels(speed, turn))
-               if (status == 14):
-                  print(msg)
-               status = (status + 1) % 15
-            else:
-               x = 0.0
-               th = 0.0
-               if (key == '\x03'):
-                  break
-            twist = Twist()
-            twist.linear.x = x * speed
-            twist.linear.y = 0.
-            twist.linear.z = 0.
-            twist.angular.x = 0.
-            twist.angular.y = 0.
-            twist.angular.z = th * turn
-            pub.publish(twist)
+      print(vels(state.speed, state.turn))
+      if args.rate > 0.:
+         runFixedRate(pub, state, twist, args.rate, args.hold)
+      else:
+         runOnKeypress(pub, settings, state, twist)
 
    except Exception as e:
       print(e)
 
    finally:
-      twist.linear.x = 0.
-      twist.linear.y = 0.
-      twist.linear.z = 0.
-      twist.angular.x = 0.
-      twist.angular.y = 0.
-      twist.angular.z = 0.
-      pub.publish(twist)
+      state.stop()
+      pub.publish(state.fill(twist))
 
       restoreTerminalSettings(settings)
 